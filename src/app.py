@@ -1,38 +1,22 @@
 import os
-import asyncio
 import streamlit as st
-from streamlit_ace import st_ace
-from services.browser_task_runner import BrowserTaskRunner, BrowserTaskExecutionError
-from utils.history_cleaner import HistoryCleaner
-from services.code_generator import CodeGenerator
-from services.config_manager import ConfigManager
-from PIL import Image
+from services.config_manager import ConfigManager, PROVIDER_API_KEYS
+from utils.logger_config import setup_logger
 import json
-from datetime import datetime
 import base64
+import io
 from pathlib import Path
+from types import MappingProxyType
+from dataclasses import dataclass
 import logging
-import sys
-import pandas as pd
+import time
 from urllib.parse import urlparse
 
+# Initialize configuration manager; this loads .env, so it comes before anything reads settings
+config_manager = ConfigManager()
 
-def get_csv_download_link(df):
-    """Generate a link allowing the data in a given pandas dataframe to be downloaded"""
-    csv = df.to_csv(index=True).encode('utf-8')
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    b64 = base64.b64encode(csv).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="interacted-elements-{timestamp}.csv" class="download-button">📥 Download Elements CSV</a>'
-    return href
-
-# Configure logging with more detailed settings
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+# Configure logging once per process (no-op on reruns)
+setup_logger(config_manager.get_config('LOG_LEVEL', 'INFO'))
 logger = logging.getLogger(__name__)
 
 # Constants
@@ -43,38 +27,70 @@ SELENIUM_JAVA = "selenium_java_code"
 DEFAULT_PERSONA = PLAYWRIGHT_TYPESCRIPT
 
 # Framework display names
-FRAMEWORK_NAMES = {
+FRAMEWORK_NAMES = MappingProxyType({
     PLAYWRIGHT_PYTHON: "Playwright Python",
     PLAYWRIGHT_TYPESCRIPT: "Playwright TypeScript",
     CYPRESS_TYPESCRIPT: "Cypress TypeScript",
     SELENIUM_JAVA: "Selenium Java"
-}
+})
 
 # Framework file extensions
-FRAMEWORK_EXTENSIONS = {
+FRAMEWORK_EXTENSIONS = MappingProxyType({
     PLAYWRIGHT_PYTHON: ".py",
     PLAYWRIGHT_TYPESCRIPT: ".ts",
     CYPRESS_TYPESCRIPT: ".cy.ts",
     SELENIUM_JAVA: ".java"
-}
+})
+
+# Code block language for each framework's generated code
+FRAMEWORK_LANGUAGES = MappingProxyType({
+    PLAYWRIGHT_PYTHON: "python",
+    PLAYWRIGHT_TYPESCRIPT: "typescript",
+    CYPRESS_TYPESCRIPT: "typescript",
+    SELENIUM_JAVA: "java"
+})
 
 # Framework prompt templates
-FRAMEWORK_PROMPTS = {
+FRAMEWORK_PROMPTS = MappingProxyType({
     PLAYWRIGHT_PYTHON: "prompts/playwright_py_code_generation.txt",
     PLAYWRIGHT_TYPESCRIPT: "prompts/playwright_ts_code_generation.txt",
     CYPRESS_TYPESCRIPT: "prompts/cypress_ts_code_generation.txt",
     SELENIUM_JAVA: "prompts/selenium_java_code_generation.txt"
+})
+
+# Selectable frameworks, in display order
+FRAMEWORK_PERSONAS = tuple(FRAMEWORK_NAMES)
+
+# Browser type options depend on whether we are deployed in the cloud; read through the
+# config manager, which has already loaded .env
+IS_CLOUD = config_manager.get_config("RUNNING_IN_CLOUD", "false").lower() == "true"
+BROWSER_TYPE_OPTIONS = ("remote",) if IS_CLOUD else ("local", "remote")
+
+# Remote browser providers, in display order: session state key and display name of each API key
+BROWSER_CLOUD_PROVIDERS = MappingProxyType({
+    "browserbase": ("browserbase_key", "Browserbase"),
+    "steeldev": ("steeldev_key", "Steel.dev"),
+    "browserless": ("browserless_key", "Browserless"),
+    "lightpanda": ("lightpanda_key", "Lightpanda")
+})
+CLOUD_PROVIDER_OPTIONS = tuple(BROWSER_CLOUD_PROVIDERS)
+
+# Re-render thresholds for the streamed code block
+CODE_STREAM_EAGER_CHUNKS = 3
+CODE_STREAM_FLUSH_CHARS = 512
+CODE_STREAM_FLUSH_SECONDS = 0.08
+# Streamed code past this many characters is frozen into its own block so flushes only re-send the tail
+CODE_STREAM_SEGMENT_CHARS = 4096
+
+# Saved setting keys whose session state key isn't just the lowercased name
+SAVED_SETTING_KEYS = {
+    "AZURE_OPENAI_ENDPOINT": "azure_endpoint",
+    "AZURE_DEPLOYMENT_NAME": "azure_deployment",
+    "BROWSER_CLOUD_PROVIDER": "cloud_provider"
 }
 
-# Set page config - MUST BE FIRST STREAMLIT COMMAND
-st.set_page_config(
-    page_title="Promptwright",
-    page_icon=Image.open(os.path.join(os.path.dirname(__file__), "..", "assets", "promptwright-logo-small.png")),
-    layout="wide"
-)
-
-# Add metadata tags for SEO and social sharing
-st.markdown("""
+# Static HTML/CSS blocks injected into the page
+_SEO_META_HTML = """
     <div style="display:none">
         <!-- Primary Meta Tags -->
         <title>Promptwright - AI-Powered Browser Automation</title>
@@ -102,10 +118,9 @@ st.markdown("""
         <meta name="robots" content="index, follow">
         <link rel="canonical" href="https://promptwright.testronai.com/">
     </div>
-""", unsafe_allow_html=True)
+"""
 
-# Add Google Analytics tracking code
-st.markdown("""
+_GA_SNIPPET_HTML = """
     <!-- Google Analytics -->
     <script async src="https://www.googletagmanager.com/gtag/js?id=G-EMDBHRDSHT"></script>
     <script>
@@ -114,144 +129,9 @@ st.markdown("""
         gtag('js', new Date());
         gtag('config', 'G-EMDBHRDSHT');
     </script>
-""", unsafe_allow_html=True)
-
-# Initialize configuration manager
-config_manager = ConfigManager()
-
-# Load the logo image
-logo_path = os.path.join(os.path.dirname(__file__), "..", "assets", "promptwright-logo-small.png")
-logo_img = Image.open(logo_path)
-
-testron_logo_path = os.path.join(os.path.dirname(__file__), "..", "assets", "testron-logo.png")
-testron_logo_img = Image.open(testron_logo_path)
-
-# Add JavaScript for local storage operations
-def init_local_storage():
-    st.markdown("""
-        <script>
-            // Function to load settings from local storage
-            const loadSettings = () => {
-                const settings = localStorage.getItem('promptwright_settings');
-                if (settings) {
-                    window.parent.postMessage({
-                        type: 'promptwright_settings_loaded',
-                        settings: settings
-                    }, '*');
-                }
-            };
-
-            // Function to save settings to local storage
-            const saveSettings = (settings) => {
-                localStorage.setItem('promptwright_settings', settings);
-            };
-
-            // Load settings when page loads
-            loadSettings();
-
-            // Listen for settings updates from Streamlit
-            window.addEventListener('message', (event) => {
-                if (event.data.type === 'promptwright_save_settings') {
-                    saveSettings(event.data.settings);
-                }
-            });
-        </script>
-    """, unsafe_allow_html=True)
-
-# Initialize local storage
-init_local_storage()
-
-# Function to load saved settings
-def initialize_session_state():
-    if 'initialized' not in st.session_state:
-        st.session_state.initialized = True
-        
-        # If we have saved settings from a previous save operation
-        if 'saved_settings' in st.session_state:
-            saved = st.session_state.saved_settings
-            # Initialize session state with saved values
-            for key, value in saved.items():
-                if key.endswith('_API_KEY'):
-                    if key == 'AZURE_OPENAI_API_KEY' and saved.get('MODEL_PROVIDER') == 'azure':
-                        st.session_state.api_key = value
-                    elif key != 'AZURE_OPENAI_API_KEY' and saved.get('MODEL_PROVIDER') in key.lower():
-                        st.session_state.api_key = value
-                elif key == 'AZURE_OPENAI_ENDPOINT':
-                    st.session_state.azure_endpoint = value
-                else:
-                    st.session_state[key.lower()] = value
-        else:
-            # Initialize with defaults from config manager
-            st.session_state.model_provider = config_manager.get_config('MODEL_PROVIDER', 'openai')
-            st.session_state.model_name = config_manager.get_config('MODEL_NAME', 'gpt-4')
-            
-            # Set the appropriate API key based on the model provider
-            if st.session_state.model_provider == 'azure':
-                st.session_state.api_key = config_manager.get_config('AZURE_OPENAI_API_KEY', '')
-            else:
-                st.session_state.api_key = config_manager.get_config(f"{st.session_state.model_provider.upper()}_API_KEY", '')
-            
-            st.session_state.azure_endpoint = config_manager.get_config('AZURE_OPENAI_ENDPOINT', '')
-            st.session_state.use_vision = config_manager.get_config('USE_VISION', 'false').lower() == 'true'
-            st.session_state.browser_type = config_manager.get_config('BROWSER_TYPE', 'local')
-            st.session_state.cloud_provider = config_manager.get_config('BROWSER_CLOUD_PROVIDER', '')
-            st.session_state.browserbase_key = config_manager.get_config('BROWSERBASE_API_KEY', '')
-            st.session_state.steeldev_key = config_manager.get_config('STEELDEV_API_KEY', '')
-            st.session_state.browserless_key = config_manager.get_config('BROWSERLESS_API_KEY', '')
-            st.session_state.lightpanda_key = config_manager.get_config('LIGHT_PANDA_API_KEY', '')
-            st.session_state.code_generation_persona = config_manager.get_config('CODE_GENERATION_PERSONA', DEFAULT_PERSONA)
-
-# Initialize session state before creating any widgets
-initialize_session_state()
-
-# Initialize task input in session state if not present
-if 'task_input' not in st.session_state:
-    st.session_state.task_input = ""
-
-# Initialize input enabled state
-if 'input_enabled' not in st.session_state:
-    st.session_state.input_enabled = True
+"""
 
-# Callback to clear task input and enable input section
-def clear_task_input():
-    st.session_state.task_input = ""
-    st.session_state.input_enabled = True
-    if 'show_save_success' in st.session_state:
-        del st.session_state.show_save_success
-
-# Callback for form submission
-def on_form_submit():
-    st.session_state.input_enabled = False
-
-# Update config manager with current session state values
-# This ensures UI settings take precedence over .env
-current_settings = {
-    "MODEL_PROVIDER": st.session_state.model_provider,
-    "MODEL_NAME": st.session_state.model_name,
-    f"{st.session_state.model_provider.upper()}_API_KEY": st.session_state.api_key,
-    "USE_VISION": str(st.session_state.use_vision).lower(),
-    "BROWSER_TYPE": st.session_state.browser_type,
-    "BROWSER_CLOUD_PROVIDER": st.session_state.cloud_provider if st.session_state.browser_type == "remote" else "",
-    "CODE_GENERATION_PERSONA": st.session_state.code_generation_persona
-}
-
-# Add browser provider API keys if they are set
-if st.session_state.browserbase_key:
-    current_settings["BROWSERBASE_API_KEY"] = st.session_state.browserbase_key
-if st.session_state.steeldev_key:
-    current_settings["STEELDEV_API_KEY"] = st.session_state.steeldev_key
-if st.session_state.browserless_key:
-    current_settings["BROWSERLESS_API_KEY"] = st.session_state.browserless_key
-if st.session_state.lightpanda_key:
-    current_settings["LIGHTPANDA_API_KEY"] = st.session_state.lightpanda_key
-
-# Update configurations in config manager with UI values
-config_manager.update_from_ui(current_settings)
-
-os.environ["ANONYMIZED_TELEMETRY"] = "false"
-
-# Add custom CSS
-st.markdown("""
+_CSS = """
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600&display=swap');
     
@@ -490,11 +370,34 @@ st.markdown("""
         border: 1px solid #E86C52 !important;
     }
 
+    /* Task execution recording frame */
+    .st-key-task-recording {
+        background-color: #2D2D2D;
+        padding: 20px;
+        border-radius: 10px;
+        margin: 20px 0;
+        border: 1px solid #E86C52;
+        width: 100%;
+    }
+
+    .st-key-task-recording img {
+        border-radius: 8px;
+    }
+
     /* Style the code block container */
     div[data-testid="stCodeBlock"] {
         margin-bottom: 1.5rem !important;
     }
 
+    /* Stack the code segments shown while streaming as one continuous block */
+    .st-key-streaming-code {
+        gap: 0 !important;
+    }
+
+    .st-key-streaming-code div[data-testid="stCodeBlock"] {
+        margin-bottom: 0 !important;
+    }
+
     /* Style the download button */
     .download-button {
         display: inline-block;
@@ -535,12 +438,12 @@ st.markdown("""
     }
 
     /* Sidebar logo styling */
-    .sidebar-logo-container {
+    .st-key-sidebar-logo-container {
         padding: 0.3rem 0.5rem 0.5rem 0.5rem !important;
         text-align: left !important;
     }
     
-    .sidebar-logo-container img {
+    .st-key-sidebar-logo-container img {
         width: 40px !important;
     }
 
@@ -633,7 +536,305 @@ st.markdown("""
         min-width: 150px;  /* Set your desired minimum width */
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+_DESCRIPTION_HTML = """
+<div class="description-text">
+<strong>Promptwright</strong> transforms natural-language user prompts into automated browser workflows using AI, while instantly generating reusable <strong>Playwright</strong> and <strong>Cypress</strong> scripts. This empowers users to run tasks cost-effectively without recurring AI dependency, bridging <strong>no-code simplicity</strong> with <strong>pro-code efficiency</strong>.
+</div>
+"""
+
+_EXAMPLE_TASKS_HTML = """
+<div class="example-tasks">
+    <h3>Example Tasks</h3>
+    <ol>
+        <li>Visit https://thinking-tester-contact-list.herokuapp.com/, login with 'testronai.com@gmail.com' as username and 'password' as password and submit. Then click 'Add a New Contact', fill in the contact form with random Indian-style data, and verify the contact details are correctly displayed in the table. Then logout from the application.</li>
+        <li>Go to https://thinking-tester-contact-list.herokuapp.com/ and enter using any random funny username  and password and do not submit the form.</li>
+        <li>Go to google.com and search for 'testronai', and open the first link which has the word testronai in it.</li>
+        <li>Go to testronai.com and click on watch demo button</li>
+    </ol>
+</div>
+"""
+
+# Static asset locations, resolved once at import
+_APP_DIR = Path(__file__).resolve().parent
+_PROJECT_DIR = _APP_DIR.parent
+_ASSETS_DIR = _PROJECT_DIR / "assets"
+
+# Task histories (one folder per timestamp) live under the project root
+_HISTORY_DIR = _PROJECT_DIR / "history"
+
+# Large CSV exports are written here and served by Streamlit's static file serving, and
+# deleted once they are older than EXPORT_MAX_AGE_SECONDS
+_EXPORTS_DIR = _APP_DIR / "static" / "exports"
+EXPORT_MAX_AGE_SECONDS = 60 * 60
+
+# Tables whose CSV would be larger than this are exported as a file instead of being sent
+# over the websocket; the Arrow buffer size is used as the estimate of the CSV size
+LARGE_EXPORT_BYTES = 10 * 1024 * 1024
+
+@dataclass(frozen=True, slots=True)
+class TaskPaths:
+    """Files belonging to one browser task run, built once per submit"""
+    timestamp: str
+    history: Path
+    cleaned: Path
+    gif: Path
+    elements: Path
+
+    @classmethod
+    def for_task(cls, history_path: str, timestamp: str) -> "TaskPaths":
+        timestamp_folder = _HISTORY_DIR / timestamp
+        return cls(
+            timestamp=timestamp,
+            history=Path(history_path),
+            cleaned=timestamp_folder / f'cleaned_history_{timestamp}.json',
+            gif=timestamp_folder / f'recording_{timestamp}.gif',
+            elements=timestamp_folder / f'elements_{timestamp}.json'
+        )
+
+@st.cache_resource(show_spinner=False)
+def _load_favicon():
+    """Load the page favicon once per process"""
+    from PIL import Image
+    return Image.open(_ASSETS_DIR / "promptwright-logo-small.png")
+
+@st.cache_resource(show_spinner=False)
+def _load_logo() -> bytes:
+    """Load the main header logo as encoded PNG bytes once per process"""
+    return (_ASSETS_DIR / "promptwright-logo-small.png").read_bytes()
+
+@st.cache_resource(show_spinner=False)
+def _load_testron_logo() -> bytes:
+    """Load the sidebar TestronAI logo as encoded PNG bytes once per process"""
+    return (_ASSETS_DIR / "testron-logo.png").read_bytes()
+
+# Set page config - MUST BE FIRST STREAMLIT COMMAND
+st.set_page_config(
+    page_title="Promptwright",
+    page_icon=_load_favicon(),
+    layout="wide"
+)
+
+# Add metadata tags for SEO/social sharing and the Google Analytics tracking code.
+# Neither is visible nor changes, so it is only sent on the first run of each session.
+if not st.session_state.get("_head_injected"):
+    st.markdown(_SEO_META_HTML, unsafe_allow_html=True)
+    st.markdown(_GA_SNIPPET_HTML, unsafe_allow_html=True)
+    st.session_state._head_injected = True
+
+# Load the logo images (cached across reruns)
+logo_img = _load_logo()
+testron_logo_img = _load_testron_logo()
+
+# Add JavaScript for local storage operations
+def init_local_storage():
+    st.markdown("""
+        <script>
+            // Function to load settings from local storage
+            const loadSettings = () => {
+                const settings = localStorage.getItem('promptwright_settings');
+                if (settings) {
+                    window.parent.postMessage({
+                        type: 'promptwright_settings_loaded',
+                        settings: settings
+                    }, '*');
+                }
+            };
+
+            // Function to save settings to local storage
+            const saveSettings = (settings) => {
+                localStorage.setItem('promptwright_settings', settings);
+            };
+
+            // Load settings when page loads
+            loadSettings();
+
+            // Listen for settings updates from Streamlit
+            window.addEventListener('message', (event) => {
+                if (event.data.type === 'promptwright_save_settings') {
+                    saveSettings(event.data.settings);
+                }
+            });
+        </script>
+    """, unsafe_allow_html=True)
+
+# Initialize local storage
+init_local_storage()
+
+def _post_settings_to_local_storage(settings: dict) -> None:
+    """Send saved settings to the local storage listener from a zero-height component"""
+    from streamlit.components.v1 import html as st_html
+    # Encode twice so the listener receives the JSON string it stores, and escape '</'
+    # so a setting value can never close the script tag
+    settings_json = json.dumps(json.dumps(settings)).replace("</", "<\\/")
+    st_html(
+        f"<script>window.parent.postMessage({{type: 'promptwright_save_settings', settings: {settings_json}}}, '*');</script>",
+        height=0
+    )
+
+# Function to load saved settings
+def initialize_session_state():
+    if 'initialized' not in st.session_state:
+        st.session_state.initialized = True
+        
+        # Bind every provider's configured API key once so the sidebar never re-reads config
+        st.session_state.provider_api_keys = {
+            provider: config_manager.get_config(key_name, '')
+            for provider, key_name in PROVIDER_API_KEYS.items()
+        }
+        
+        # If we have saved settings from a previous save operation
+        if 'saved_settings' in st.session_state:
+            saved = st.session_state.saved_settings
+            # Pick the API key of the saved provider with a single lookup
+            api_key_name = PROVIDER_API_KEYS.get(saved.get('MODEL_PROVIDER', 'openai'))
+            st.session_state.api_key = saved.get(api_key_name, '')
+            
+            # Initialize session state with the remaining saved values
+            for key, value in saved.items():
+                if not key.endswith('_API_KEY'):
+                    st.session_state[SAVED_SETTING_KEYS.get(key, key.lower())] = value
+        else:
+            # Initialize with defaults from config manager
+            st.session_state.model_provider = config_manager.get_config('MODEL_PROVIDER', 'openai')
+            st.session_state.model_name = config_manager.get_config('MODEL_NAME', 'gpt-4')
+            
+            # Set the appropriate API key based on the model provider
+            st.session_state.api_key = st.session_state.provider_api_keys.get(st.session_state.model_provider, '')
+            
+            st.session_state.azure_endpoint = config_manager.get_config('AZURE_OPENAI_ENDPOINT', '')
+            st.session_state.use_vision = config_manager.get_config('USE_VISION', 'false').lower() == 'true'
+            st.session_state.browser_type = config_manager.get_config('BROWSER_TYPE', 'local')
+            st.session_state.cloud_provider = config_manager.get_config('BROWSER_CLOUD_PROVIDER', '')
+            st.session_state.browserbase_key = config_manager.get_config('BROWSERBASE_API_KEY', '')
+            st.session_state.steeldev_key = config_manager.get_config('STEELDEV_API_KEY', '')
+            st.session_state.browserless_key = config_manager.get_config('BROWSERLESS_API_KEY', '')
+            st.session_state.lightpanda_key = config_manager.get_config('LIGHT_PANDA_API_KEY', '')
+            st.session_state.code_generation_persona = config_manager.get_config('CODE_GENERATION_PERSONA', DEFAULT_PERSONA)
+
+# Initialize session state before creating any widgets
+initialize_session_state()
+
+# Initialize task input in session state if not present
+if 'task_input' not in st.session_state:
+    st.session_state.task_input = ""
+
+# Initialize input enabled state
+if 'input_enabled' not in st.session_state:
+    st.session_state.input_enabled = True
+
+# Callback to clear task input and enable input section
+def clear_task_input():
+    st.session_state.task_input = ""
+    st.session_state.input_enabled = True
+    if 'show_save_success' in st.session_state:
+        del st.session_state.show_save_success
+
+# Callback for form submission
+def on_form_submit():
+    st.session_state.input_enabled = False
+
+# Session state keys that _build_settings reads
+SETTINGS_INPUT_KEYS = (
+    "model_provider", "model_name", "api_key", "use_vision", "browser_type", "cloud_provider",
+    "code_generation_persona", "azure_endpoint", "azure_deployment",
+    "browserbase_key", "steeldev_key", "browserless_key", "lightpanda_key"
+)
+
+def _build_settings(model_name: str = None) -> dict:
+    """Build the config dict for the current UI state, optionally overriding the model name"""
+    settings = {
+        "MODEL_PROVIDER": st.session_state.model_provider,
+        "MODEL_NAME": model_name or st.session_state.model_name,
+        PROVIDER_API_KEYS.get(st.session_state.model_provider, 'OPENAI_API_KEY'): st.session_state.api_key,
+        "USE_VISION": str(st.session_state.use_vision).lower(),
+        "BROWSER_TYPE": st.session_state.browser_type,
+        "BROWSER_CLOUD_PROVIDER": st.session_state.cloud_provider if st.session_state.browser_type == "remote" else "",
+        "CODE_GENERATION_PERSONA": st.session_state.code_generation_persona
+    }
+    
+    # Add Azure OpenAI endpoint if Azure is selected
+    if st.session_state.model_provider == "azure":
+        # Clean the endpoint URL before setting it
+        endpoint = st.session_state.get("azure_endpoint", "")
+        if endpoint:
+            try:
+                parsed = urlparse(endpoint)
+                endpoint = f"{parsed.scheme}://{parsed.netloc}"
+            except Exception as e:
+                logger.warning(f"Error cleaning Azure endpoint: {str(e)}")
+        settings["AZURE_OPENAI_ENDPOINT"] = endpoint
+        
+        # Add Azure deployment name if set
+        if st.session_state.get("azure_deployment"):
+            settings["AZURE_DEPLOYMENT_NAME"] = st.session_state.azure_deployment
+    
+    # Add browser provider API keys if they are set
+    if st.session_state.get("browserbase_key"):
+        settings["BROWSERBASE_API_KEY"] = st.session_state.browserbase_key
+    if st.session_state.get("steeldev_key"):
+        settings["STEELDEV_API_KEY"] = st.session_state.steeldev_key
+    if st.session_state.get("browserless_key"):
+        settings["BROWSERLESS_API_KEY"] = st.session_state.browserless_key
+    if st.session_state.get("lightpanda_key"):
+        settings["LIGHTPANDA_API_KEY"] = st.session_state.lightpanda_key
+    
+    return settings
+
+def _apply_settings(model_name: str = None, force: bool = False) -> None:
+    """
+    Push settings to the config manager, only building them if the UI inputs changed since last time
+    
+    The config manager is shared by all sessions, so the settings are also pushed again whenever
+    any other session changed it since this session last did.
+    """
+    inputs_hash = hash((model_name,) + tuple(st.session_state.get(key) for key in SETTINGS_INPUT_KEYS))
+    if not force and st.session_state.get("_cfg_applied") == (inputs_hash, config_manager.version):
+        return
+    config_manager.update_from_ui(_build_settings(model_name))
+    st.session_state._cfg_applied = (inputs_hash, config_manager.version)
+
+# Default model options as fallback
+DEFAULT_MODEL_OPTIONS = {
+    "openai": ["gpt-4", "gpt-4o-mini", "gpt-4o"],
+    "azure": ["gpt-4", "gpt-4-turbo", "gpt-35-turbo"],
+    "anthropic": ["claude-3-5-haiku-20241022", "claude-3-5-sonnet-20241022"],
+    "deepseek": ["deepseek-chat"],
+    "groq": ["mixtral-8x7b-32768", "llama-3.3-70b-versatile"],
+    "google": ["gemini-2.0-flash", "gemini-2.0-flash-lite-preview-02-05", "gemini-1.5-pro"]
+}
+
+# Environment variable holding the comma-separated model list for each provider
+MODEL_LIST_ENV_VARS = {
+    "openai": "OPENAI_MODELS",
+    "azure": "AZURE_OPENAI_MODELS",
+    "anthropic": "ANTHROPIC_MODELS",
+    "deepseek": "DEEPSEEK_MODELS",
+    "groq": "GROQ_MODELS",
+    "google": "GOOGLE_MODELS"
+}
+
+@st.cache_data(show_spinner=False)
+def _get_model_options() -> dict:
+    """Load model options per provider from environment variables, parsed once per process"""
+    model_options = {}
+    for provider, env_var_name in MODEL_LIST_ENV_VARS.items():
+        models_str = config_manager.get_config(env_var_name, '')
+        if models_str:
+            model_options[provider] = [m.strip() for m in models_str.split(',') if m.strip()]
+        else:
+            model_options[provider] = DEFAULT_MODEL_OPTIONS[provider]
+    return model_options
+
+# Update config manager with current session state values
+# This ensures UI settings take precedence over .env
+_apply_settings()
+
+config_manager.set_config("ANONYMIZED_TELEMETRY", "false")
+
+# Add custom CSS
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # Title and description
 header_cols = st.columns([1, 6])
@@ -642,105 +843,39 @@ with header_cols[0]:
 with header_cols[1]:
     st.markdown("<h1 class='app-title'>Promptwright</h1>", unsafe_allow_html=True)
 
-st.markdown("""
-<div class="description-text">
-<strong>Promptwright</strong> transforms natural-language user prompts into automated browser workflows using AI, while instantly generating reusable <strong>Playwright</strong> and <strong>Cypress</strong> scripts. This empowers users to run tasks cost-effectively without recurring AI dependency, bridging <strong>no-code simplicity</strong> with <strong>pro-code efficiency</strong>.
-</div>
-""", unsafe_allow_html=True)
+st.markdown(_DESCRIPTION_HTML, unsafe_allow_html=True)
+
+def _sidebar_section_header(title: str) -> None:
+    """Render a sidebar section divider and its header as a single markdown element"""
+    # Streamlit closes unbalanced tags per element, so the section div never wrapped the
+    # widgets below it; emitting it together with the header keeps the same look
+    st.markdown(f"<div class='sidebar-section'></div><h3 class='sidebar-header'>{title}</h3>", unsafe_allow_html=True)
 
 # Create a sidebar for configurations
 with st.sidebar:
     # Add logo to sidebar
-    st.markdown('<div class="sidebar-logo-container">', unsafe_allow_html=True)
-    st.image(testron_logo_img, width=80)
-    st.markdown('</div>', unsafe_allow_html=True)
+    with st.container(key="sidebar-logo-container"):
+        st.image(testron_logo_img, width=80)
     
     st.markdown("<h2 class='sidebar-header'>⚙️ Configuration</h2>", unsafe_allow_html=True)
     
     # Model Configuration Section
-    st.markdown("<div class='sidebar-section'>", unsafe_allow_html=True)
-    st.markdown("<h3 class='sidebar-header'>🤖 Model Settings</h3>", unsafe_allow_html=True)
+    _sidebar_section_header("🤖 Model Settings")
     
     # Dynamic model options based on provider and environment variables
-    def get_model_list_from_env(env_var_name, default_list):
-        """Helper function to get model list from environment variable"""
-        models_str = config_manager.get_config(env_var_name, '')
-        return models_str.split(',') if models_str else default_list
-    
-    # Default model options as fallback
-    default_model_options = {
-        "openai": ["gpt-4", "gpt-4o-mini", "gpt-4o"],
-        "azure": ["gpt-4", "gpt-4-turbo", "gpt-35-turbo"],
-        "anthropic": ["claude-3-5-haiku-20241022", "claude-3-5-sonnet-20241022"],
-        "deepseek": ["deepseek-chat"],
-        "groq": ["mixtral-8x7b-32768", "llama-3.3-70b-versatile"],
-        "google": ["gemini-2.0-flash", "gemini-2.0-flash-lite-preview-02-05", "gemini-1.5-pro"]
-    }
-    
-    # Load model options from environment variables
-    model_options = {
-        "openai": get_model_list_from_env('OPENAI_MODELS', default_model_options["openai"]),
-        "azure": get_model_list_from_env('AZURE_OPENAI_MODELS', default_model_options["azure"]),
-        "anthropic": get_model_list_from_env('ANTHROPIC_MODELS', default_model_options["anthropic"]),
-        "deepseek": get_model_list_from_env('DEEPSEEK_MODELS', default_model_options["deepseek"]),
-        "groq": get_model_list_from_env('GROQ_MODELS', default_model_options["groq"]),
-        "google": get_model_list_from_env('GOOGLE_MODELS', default_model_options["google"])
-    }
-    
-    # Filter out empty strings from model lists
-    model_options = {k: [m for m in v if m.strip()] for k, v in model_options.items()}
+    model_options = _get_model_options()
     
     # Create a callback to update config when model provider changes
     def on_model_provider_change():
-        current_settings = {
-            "MODEL_PROVIDER": st.session_state.model_provider,
-            "MODEL_NAME": model_options[st.session_state.model_provider][0],  # Default to first model
-            f"{st.session_state.model_provider.upper()}_API_KEY": st.session_state.api_key,
-            "USE_VISION": str(st.session_state.use_vision).lower(),
-            "BROWSER_TYPE": st.session_state.browser_type,
-            "BROWSER_CLOUD_PROVIDER": st.session_state.cloud_provider if st.session_state.browser_type == "remote" else "",
-            "CODE_GENERATION_PERSONA": st.session_state.code_generation_persona
-        }
-        
-        # Add Azure OpenAI endpoint if Azure is selected
-        if st.session_state.model_provider == "azure":
-            # Clean the endpoint URL before setting it
-            endpoint = st.session_state.azure_endpoint
-            if endpoint:
-                try:
-                    parsed = urlparse(endpoint)
-                    endpoint = f"{parsed.scheme}://{parsed.netloc}"
-                except Exception as e:
-                    logger.warning(f"Error cleaning Azure endpoint: {str(e)}")
-            current_settings["AZURE_OPENAI_ENDPOINT"] = endpoint
-        
-        config_manager.update_from_ui(current_settings)
+        # Fall back to the configured key of the newly selected provider
+        if not st.session_state.api_key:
+            st.session_state.api_key = st.session_state.provider_api_keys.get(st.session_state.model_provider, '')
+        # Default to the first model of the newly selected provider
+        _apply_settings(model_options[st.session_state.model_provider][0])
     
     # Create a callback to update config when model name changes
     def on_model_name_change():
-        current_settings = {
-            "MODEL_PROVIDER": st.session_state.model_provider,
-            "MODEL_NAME": st.session_state.model_name,
-            f"{st.session_state.model_provider.upper()}_API_KEY": st.session_state.api_key,
-            "USE_VISION": str(st.session_state.use_vision).lower(),
-            "BROWSER_TYPE": st.session_state.browser_type,
-            "BROWSER_CLOUD_PROVIDER": st.session_state.cloud_provider if st.session_state.browser_type == "remote" else "",
-            "CODE_GENERATION_PERSONA": st.session_state.code_generation_persona
-        }
-        
-        # Add Azure OpenAI endpoint if Azure is selected
-        if st.session_state.model_provider == "azure":
-            # Clean the endpoint URL before setting it
-            endpoint = st.session_state.azure_endpoint
-            if endpoint:
-                try:
-                    parsed = urlparse(endpoint)
-                    endpoint = f"{parsed.scheme}://{parsed.netloc}"
-                except Exception as e:
-                    logger.warning(f"Error cleaning Azure endpoint: {str(e)}")
-            current_settings["AZURE_OPENAI_ENDPOINT"] = endpoint
-        
-        config_manager.update_from_ui(current_settings)
+        _apply_settings()
     
     model_provider = st.selectbox(
         "Model Provider",
@@ -784,14 +919,6 @@ with st.sidebar:
     # Update API key label for Azure
     api_key_label = "Azure OpenAI API Key" if model_provider == "azure" else f"{model_provider.title()} API Key"
     
-    # Get the appropriate API key based on provider
-    if model_provider == "azure":
-        if not st.session_state.get("api_key"):
-            st.session_state.api_key = config_manager.get_config('AZURE_OPENAI_API_KEY', '')
-    else:
-        if not st.session_state.get("api_key"):
-            st.session_state.api_key = config_manager.get_config(f'{model_provider.upper()}_API_KEY', '')
-    
     api_key = st.text_input(
         api_key_label,
         type="password",
@@ -805,39 +932,30 @@ with st.sidebar:
         key="use_vision",
         value=False
     )
-    st.markdown("</div>", unsafe_allow_html=True)
     
     # Browser Configuration Section
-    st.markdown("<div class='sidebar-section'>", unsafe_allow_html=True)
-    st.markdown("<h3 class='sidebar-header'>🌐 Browser Settings</h3>", unsafe_allow_html=True)
-    
-    # Determine browser type options based on environment
-    is_cloud = os.getenv("RUNNING_IN_CLOUD", "false").lower() == "true"
-    browser_type_options = ["remote"] if is_cloud else ["local", "remote"]
+    _sidebar_section_header("🌐 Browser Settings")
     
     # Reset browser type if in cloud and currently set to local
-    if is_cloud and st.session_state.get("browser_type") == "local":
+    if IS_CLOUD and st.session_state.get("browser_type") == "local":
         st.session_state.browser_type = "remote"
     
     browser_type = st.selectbox(
         "Browser Type",
-        browser_type_options,
+        BROWSER_TYPE_OPTIONS,
         help="Select 'local' for browser on your machine or 'remote' for cloud-based browser",
         key="browser_type"
     )
     
     # Only show cloud provider and API key settings if browser type is remote
     if browser_type == "remote":
-        # Define available cloud providers
-        cloud_providers = ["browserbase", "steeldev", "browserless", "lightpanda"]
-        
         # Ensure cloud_provider has a valid value
-        if "cloud_provider" not in st.session_state or st.session_state.cloud_provider not in cloud_providers:
-            st.session_state.cloud_provider = cloud_providers[0]
+        if st.session_state.get("cloud_provider") not in BROWSER_CLOUD_PROVIDERS:
+            st.session_state.cloud_provider = CLOUD_PROVIDER_OPTIONS[0]
             
         cloud_provider = st.selectbox(
             "Browser Cloud Provider",
-            cloud_providers,
+            CLOUD_PROVIDER_OPTIONS,
             help="Select a cloud provider for remote browser execution",
             key="cloud_provider"
         )
@@ -846,128 +964,46 @@ with st.sidebar:
         if cloud_provider:
             st.markdown("<h4 style='color: #E86C52; margin-top: 10px; font-size: 0.9rem; border-bottom: 1px solid #E86C52;'>🔑 API Key</h4>", unsafe_allow_html=True)
             
-            if cloud_provider == "browserbase":
-                browserbase_key = st.text_input(
-                    "Browserbase API Key",
-                    type="password",
-                    help="API key for Browserbase cloud browser service",
-                    key="browserbase_key"
-                )
-            elif cloud_provider == "steeldev":
-                steeldev_key = st.text_input(
-                    "Steel.dev API Key",
-                    type="password",
-                    help="API key for Steel.dev cloud browser service",
-                    key="steeldev_key"
-                )
-            elif cloud_provider == "browserless":
-                browserless_key = st.text_input(
-                    "Browserless API Key",
-                    type="password",
-                    help="API key for Browserless cloud browser service",
-                    key="browserless_key"
-                )
-            elif cloud_provider == "lightpanda":
-                lightpanda_key = st.text_input(
-                    "Lightpanda API Key",
-                    type="password",
-                    help="API key for Lightpanda cloud browser service",
-                    key="lightpanda_key"
-                )
+            key_name, display_name = BROWSER_CLOUD_PROVIDERS[cloud_provider]
+            st.text_input(
+                f"{display_name} API Key",
+                type="password",
+                help=f"API key for {display_name} cloud browser service",
+                key=key_name
+            )
 
             # Clear API keys for non-selected providers
-            provider_keys = {
-                "browserbase": "browserbase_key",
-                "steeldev": "steeldev_key",
-                "browserless": "browserless_key",
-                "lightpanda": "lightpanda_key"
-            }
-            
-            for provider, key in provider_keys.items():
-                if provider != cloud_provider and key in st.session_state:
-                    st.session_state[key] = ""
+            for provider, (provider_key_name, _) in BROWSER_CLOUD_PROVIDERS.items():
+                if provider != cloud_provider:
+                    st.session_state[provider_key_name] = ""
     else:
         # Set default empty values when browser type is local
         st.session_state.cloud_provider = ""
-        st.session_state.browserbase_key = ""
-        st.session_state.steeldev_key = ""
-        st.session_state.browserless_key = ""
-        st.session_state.lightpanda_key = ""
-    
-    st.markdown("</div>", unsafe_allow_html=True)
+        for key_name, _ in BROWSER_CLOUD_PROVIDERS.values():
+            st.session_state[key_name] = ""
     
     # General Settings Section
-    st.markdown("<div class='sidebar-section'>", unsafe_allow_html=True)
-    st.markdown("<h3 class='sidebar-header'>🔧 General Settings</h3>", unsafe_allow_html=True)
+    _sidebar_section_header("🔧 General Settings")
     
     code_generation_persona = st.selectbox(
         "Code Generation Framework",
-        [PLAYWRIGHT_PYTHON, PLAYWRIGHT_TYPESCRIPT, CYPRESS_TYPESCRIPT, SELENIUM_JAVA],
+        FRAMEWORK_PERSONAS,
         format_func=lambda x: FRAMEWORK_NAMES[x],
         help="Select the test automation framework and language",
         key="code_generation_persona"
     )
     
-    st.markdown("</div>", unsafe_allow_html=True)
-    
     # Save Configuration Button
     if st.button("💾 Save Configuration", type="primary"):
         # Get current values from widgets directly
-        current_settings = {
-            "MODEL_PROVIDER": st.session_state.model_provider,
-            "MODEL_NAME": st.session_state.model_name,
-            f"{st.session_state.model_provider.upper()}_API_KEY": st.session_state.api_key,
-            "USE_VISION": str(st.session_state.use_vision).lower(),
-            "BROWSER_TYPE": st.session_state.browser_type,
-            "BROWSER_CLOUD_PROVIDER": st.session_state.cloud_provider if st.session_state.browser_type == "remote" else "",
-            "CODE_GENERATION_PERSONA": st.session_state.code_generation_persona
-        }
-        
-        # Add Azure-specific settings if Azure is selected
-        if st.session_state.model_provider == "azure":
-            # Clean the endpoint URL before setting it
-            endpoint = st.session_state.azure_endpoint
-            if endpoint:
-                try:
-                    parsed = urlparse(endpoint)
-                    endpoint = f"{parsed.scheme}://{parsed.netloc}"
-                except Exception as e:
-                    logger.warning(f"Error cleaning Azure endpoint: {str(e)}")
-            current_settings["AZURE_OPENAI_ENDPOINT"] = endpoint
-            
-            # Add Azure deployment name if set
-            if st.session_state.azure_deployment:
-                current_settings["AZURE_DEPLOYMENT_NAME"] = st.session_state.azure_deployment
-        
-        # Add browser provider API keys if they are set
-        if st.session_state.browserbase_key:
-            current_settings["BROWSERBASE_API_KEY"] = st.session_state.browserbase_key
-        if st.session_state.steeldev_key:
-            current_settings["STEELDEV_API_KEY"] = st.session_state.steeldev_key
-        if st.session_state.browserless_key:
-            current_settings["BROWSERLESS_API_KEY"] = st.session_state.browserless_key
-        if st.session_state.lightpanda_key:
-            current_settings["LIGHTPANDA_API_KEY"] = st.session_state.lightpanda_key
+        current_settings = _build_settings()
         
         # Update configurations in config manager
-        config_manager.update_from_ui(current_settings)
+        _apply_settings()
         
         # Store settings for next session
         st.session_state.saved_settings = current_settings
         
-        # Save settings to local storage
-        st.markdown(
-            f"""
-            <script>
-                window.parent.postMessage({{
-                    type: 'promptwright_save_settings',
-                    settings: '{json.dumps(current_settings)}'
-                }}, '*');
-            </script>
-            """,
-            unsafe_allow_html=True
-        )
-        
         # Set a flag in session state to show the success message after rerun
         st.session_state.show_save_success = True
         st.session_state.last_saved_settings = current_settings
@@ -982,6 +1018,9 @@ with st.sidebar:
 # Show success message if flag is set (after rerun)
 if 'show_save_success' in st.session_state and st.session_state.show_save_success:
     st.sidebar.success("✅ Configuration saved successfully!")
+    # Save settings to local storage now that the rerun won't discard the component
+    with st.sidebar:
+        _post_settings_to_local_storage(st.session_state.last_saved_settings)
     with st.sidebar.expander("View Current Settings"):
         st.json(st.session_state.last_saved_settings)
     # Clear the flag
@@ -998,287 +1037,421 @@ with st.form(key="task_input_form"):
         disabled=not st.session_state.input_enabled
     )
     
+    st.checkbox(
+        "Force a fresh browser run",
+        key="force_fresh_run",
+        help="Run the browser even if this exact task was run before, instead of reusing the earlier run",
+        disabled=not st.session_state.input_enabled
+    )
+    
     submitted = st.form_submit_button("Go 🚀", 
                                     disabled=not st.session_state.input_enabled,
                                     on_click=on_form_submit)
 
-def execute_browser_task(task: str, status_placeholder) -> tuple[str, str] | None:
-    """Execute browser task and return history path and timestamp if successful"""
-    try:
-        # Create history folder if it doesn't exist and ensure we use absolute path
-        history_folder = Path(os.path.join(os.path.dirname(__file__), "..", "history")).resolve()
-        history_folder.mkdir(exist_ok=True, parents=True)
-        
+@st.cache_resource(show_spinner=False)
+def _get_background_loop():
+    """Start one long-lived event loop thread that every browser task is scheduled on"""
+    import asyncio
+    import threading
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="browser-task-loop", daemon=True).start()
+    return loop
+
+# Upper bound on how long server exit waits for pooled browsers to close
+_RUNNER_SHUTDOWN_TIMEOUT_S = 3
+
+@st.cache_resource(show_spinner=False)
+def _get_task_runner():
+    """Create the browser task runner once per process and reuse it across submissions"""
+    import asyncio
+    import atexit
+    from services.browser_task_runner import BrowserTaskRunner
+    runner = BrowserTaskRunner()
+    
+    # Pooled browsers live on the background loop, so close them there when the server exits
+    loop = _get_background_loop()
+
+    def _shutdown_runner():
+        import concurrent.futures
+        future = asyncio.run_coroutine_threadsafe(runner.shutdown(), loop)
         try:
-            # Execute the browser task first to get the timestamp
-            with st.spinner("🚀 Executing browser task..."):
-                runner = BrowserTaskRunner()
-                history_path, timestamp = asyncio.run(runner.execute_task(task))
-                return history_path, timestamp
-        except BrowserTaskExecutionError as e:
-            status_placeholder.error(f"❌ Browser Task Failed: {str(e)}")
-            # Re-enable input for new task
-            st.session_state.input_enabled = True
-            st.session_state.task_failed = True
-            return None
+            future.result(timeout=_RUNNER_SHUTDOWN_TIMEOUT_S)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            logger.warning("Browser pool did not shut down within %ss, exiting anyway", _RUNNER_SHUTDOWN_TIMEOUT_S)
         except Exception as e:
-            status_placeholder.error(f"❌ Unexpected error during browser task: {str(e)}")
-            logger.error(f"Unexpected error during browser task: {type(e).__name__} - {str(e)}")
-            # Re-enable input for new task
-            st.session_state.input_enabled = True
-            st.session_state.task_failed = True
-            return None
-    except Exception as e:
-        status_placeholder.error(f"❌ Error during task execution: {str(e)}")
-        st.session_state.input_enabled = True
-        st.session_state.task_failed = True
-        return None
-
-if submitted and task:
+            logger.warning("Error shutting down browser task runner: %s", e)
+
+    atexit.register(_shutdown_runner)
+    return runner
+
+def _run_in_background(func, *args):
+    """Run a blocking call in a worker thread of the background loop and return its future"""
+    import asyncio
+    return asyncio.run_coroutine_threadsafe(asyncio.to_thread(func, *args), _get_background_loop())
+
+def _log_cleaned_history_write(future) -> None:
+    """Report a failed background write of the cleaned history file"""
+    if future.exception() is not None:
+        logger.error(f"Failed to save cleaned history: {future.exception()}")
+
+def execute_browser_task(task: str, status_placeholder, bypass_cache: bool = False):
+    """Execute browser task and return its TaskRunResult if successful, otherwise None"""
+    # Imported on demand so the browser stack isn't loaded until a task is submitted
+    import asyncio
+    from services.browser_task_runner import BrowserTaskExecutionError
+    
     try:
-        # Initialize task failure flag
-        st.session_state.task_failed = False
+        # Create history folder if it doesn't exist
+        _HISTORY_DIR.mkdir(exist_ok=True, parents=True)
         
-        # Create placeholder for status messages
-        status_placeholder = st.empty()
-        progress_container = st.empty()
+        # Execute the browser task first to get the timestamp
+        with st.spinner("🚀 Executing browser task..."):
+            runner = _get_task_runner()
+            future = asyncio.run_coroutine_threadsafe(runner.execute_task(task, bypass_cache), _get_background_loop())
+            return future.result()
+    except BrowserTaskExecutionError as e:
+        status_placeholder.error(f"❌ Browser Task Failed: {str(e)}")
+    except Exception as e:
+        status_placeholder.error(f"❌ Unexpected error during browser task: {str(e)}")
+        logger.error(f"Unexpected error during browser task: {type(e).__name__} - {str(e)}")
+    
+    # Re-enable input for new task
+    st.session_state.input_enabled = True
+    st.session_state.task_failed = True
+    return None
+
+def _new_task_button(key: str, code_section, button_section, gif_section) -> None:
+    """Render the Start New Task button, clearing the task output when clicked"""
+    if st.button("🔄 Start New Task", key=key, use_container_width=True, type="primary", on_click=clear_task_input):
+        code_section.empty()
+        button_section.empty()
+        gif_section.empty()
+        st.rerun()
+
+def _show_new_task_button(code_section, button_section, gif_section) -> None:
+    """Show only the New Task button after a failed submission"""
+    with button_section:
+        _, col2 = st.columns(2)
+        with col2:
+            _new_task_button("new_task_button", code_section, button_section, gif_section)
+
+def _clean_history(paths: TaskPaths, status_placeholder) -> tuple[dict, str]:
+    """Clean the task history in memory and save the cleaned copy in the background; returns it parsed and serialized"""
+    from utils.history_cleaner import HistoryCleaner
+    
+    with status_placeholder:
+        with st.spinner("🧹 Cleaning history..."):
+            # Clean the history in memory; code generation uses it directly
+            cleaned_history = HistoryCleaner.load_cleaned_history(
+                paths.history,
+                fast=config_manager.get_config('FAST_CLEAN', 'false').lower() == 'true'
+            )
+            
+            # Serialize it once for both the saved copy and the prompt, then persist the copy
+            # on the background loop, off the critical path
+            cleaned_history_json = HistoryCleaner.serialize_cleaned_history(cleaned_history)
+            cleaned_history_write = _run_in_background(HistoryCleaner.write_cleaned_history, cleaned_history_json, str(paths.cleaned))
+            cleaned_history_write.add_done_callback(_log_cleaned_history_write)
+    return cleaned_history, cleaned_history_json.decode('utf-8')
+
+def _generate_code(persona: str, cleaned_history: dict, cleaned_history_json: str, paths: TaskPaths, status_placeholder, code_section) -> str | None:
+    """Stream generated code into the code section; returns None if the model produced nothing"""
+    from services.code_generator import CodeGenerator
+    from utils.code_fence_stripper import CodeFenceStripper
+    
+    # Show loading message before code generation
+    status_placeholder.info("🚀 Test code is brewing...☕⏳")
+    
+    # Now initialize the code section after browser task is complete
+    language = FRAMEWORK_LANGUAGES[persona]
+    with code_section:
+        st.markdown(f"### Generated {FRAMEWORK_NAMES[persona]} Code", help="Code is being generated in real-time")
+        code_slot = st.empty()
+    
+    # While streaming, completed segments stay as they are and only the open tail block is re-sent
+    stream_blocks = code_slot.container(key="streaming-code")
+    tail_block = stream_blocks.empty()
+    frozen_chars = 0
+    
+    # Stream the code generation
+    generator = CodeGenerator()
+    
+    # Initialize variables for code generation
+    fence_stripper = CodeFenceStripper()
+    chunk_count = 0
+    chars_since_flush = 0
+    last_flush = time.monotonic()
+    
+    for code_chunk in generator.generate_typescript_code_stream(
+        cleaned_history_path=paths.cleaned,
+        prompt_template_path=str(_PROJECT_DIR / FRAMEWORK_PROMPTS[persona]),
+        history_data=cleaned_history,
+        history_content=cleaned_history_json
+    ):
+        chunk_count += 1
+        chars_since_flush += len(code_chunk)
         
-        # Create containers in the desired display order but don't populate them yet
-        code_section = st.container()
-        button_section = st.container()
-        gif_section = st.container()
+        # Clean up the code for display - remove markdown code fences if present
+        fence_stripper.feed(code_chunk)
         
-        # Function to show new task button
-        def show_new_task_button():
-            with button_section:
-                col1, col2 = st.columns(2)
-                with col2:
-                    if st.button("🔄 Start New Task", key="new_task_button", use_container_width=True, type="primary", on_click=clear_task_input):
-                        code_section.empty()
-                        button_section.empty()
-                        gif_section.empty()
-                        st.rerun()
+        # Update the code display in real-time, but only re-send it once enough
+        # text or time has accumulated (the first chunks go out immediately)
+        now = time.monotonic()
+        if (chunk_count <= CODE_STREAM_EAGER_CHUNKS
+                or chars_since_flush >= CODE_STREAM_FLUSH_CHARS
+                or now - last_flush >= CODE_STREAM_FLUSH_SECONDS):
+            tail = fence_stripper.text_since(frozen_chars)
+            if len(tail) >= CODE_STREAM_SEGMENT_CHARS:
+                # Freeze everything up to the last complete line and start a new tail block
+                cut = tail.rfind("\n")
+                if cut > 0:
+                    tail_block.code(tail[:cut], language=language)
+                    tail_block = stream_blocks.empty()
+                    frozen_chars += cut + 1
+                    tail = tail[cut + 1:]
+            tail_block.code(tail, language=language)
+            chars_since_flush = 0
+            last_flush = now
+    
+    # Replace the streamed segments with the complete code in a single block
+    generated_code = fence_stripper.finish()
+    code_slot.code(generated_code, language=language)
+    
+    return generated_code if chunk_count > 0 else None
+
+def _render_outputs(persona: str, generated_code: str, paths: TaskPaths, gif_read, status_placeholder, code_section, button_section, gif_section, partial: bool = False) -> None:
+    """Show the download and New Task buttons followed by the task recording"""
+    if partial:
+        status_placeholder.warning("⚠️ Code generated from an incomplete browser run; it only covers the steps completed in time")
+    else:
+        status_placeholder.success(f"✅ Code generated successfully!")
+    
+    # Add buttons in the button section
+    with button_section:
+        # Create two columns for the buttons
+        col1, col2 = st.columns(2)
         
-        try:
-            # Execute browser task
-            result = execute_browser_task(task, status_placeholder)
-            
-            # If task failed, show only the New Task button and stop
-            if st.session_state.task_failed:
-                show_new_task_button()
-                st.stop()
-            
-            history_path, timestamp = result
+        # Add download button in the first column
+        with col1:
+            extension = FRAMEWORK_EXTENSIONS[persona]
+            framework_name = FRAMEWORK_NAMES[persona]
             
-            # Use absolute paths consistently
-            history_folder = Path(os.path.join(os.path.dirname(__file__), "..", "history")).resolve()
-            timestamp_folder = history_folder / timestamp
-            cleaned_history_path = timestamp_folder / f'cleaned_history_{timestamp}.json'
-            gif_path = timestamp_folder / f'recording_{timestamp}.gif'
-            elements_file = timestamp_folder / f'elements_{timestamp}.json'
-            
-            with status_placeholder:
-                with st.spinner("🧹 Cleaning history..."):
-                    # Clean the history
-                    cleaner = HistoryCleaner()
-                    cleaner.clean_history(history_path, str(cleaned_history_path))
-            
-            with status_placeholder:
-                # Show loading message before code generation
-                st.info("🚀 Test code is brewing...☕⏳")
-                
-                try:
-                    # Now initialize the code section after browser task is complete
-                    with code_section:
-                        # Determine language based on persona
-                        if st.session_state.code_generation_persona == PLAYWRIGHT_PYTHON:
-                            language = "python"
-                        elif st.session_state.code_generation_persona == SELENIUM_JAVA:
-                            language = "java"
-                        else:
-                            language = "typescript"
-                        
-                        framework_name = FRAMEWORK_NAMES[st.session_state.code_generation_persona]
-                        st.markdown(f"### Generated {framework_name} Code", help="Code is being generated in real-time")
-                        code_container = st.code("", language=language)
-                    
-                    # Stream the code generation
-                    generator = CodeGenerator()
-                    
-                    # Select the appropriate prompt template based on persona
-                    prompt_template_path = FRAMEWORK_PROMPTS[st.session_state.code_generation_persona]
-                    
-                    # Initialize variables for code generation
-                    generated_code = ""
-                    chunk_count = 0
-                    
-                    for code_chunk in generator.generate_typescript_code_stream(
-                        cleaned_history_path=cleaned_history_path,
-                        prompt_template_path=prompt_template_path
-                    ):
-                        chunk_count += 1
-                        generated_code += code_chunk
-                        
-                        # Clean up the code for display - remove markdown code fences if present
-                        display_code = generated_code
-                        if "```python" in display_code:
-                            display_code = "\n".join(line for line in display_code.split("\n") 
-                                              if not line.strip().startswith("```python") and not line.strip() == "```")
-                        elif "```typescript" in display_code:
-                            display_code = "\n".join(line for line in display_code.split("\n") 
-                                              if not line.strip().startswith("```typescript") and not line.strip() == "```")
-                        elif "```java" in display_code:
-                            display_code = "\n".join(line for line in display_code.split("\n") 
-                                              if not line.strip().startswith("```java") and not line.strip() == "```")
-                        
-                        # Update the code display in real-time
-                        code_container.code(display_code, language=language)
-                    
-                    # Show appropriate message based on generation result
-                    if chunk_count > 0:
-                        status_placeholder.success(f"✅ Code generated successfully!")
-                        
-                        # Add buttons in the button section
-                        with button_section:
-                            # Create two columns for the buttons
-                            col1, col2 = st.columns(2)
-                            
-                            # Clean up the code for download
-                            download_code = generated_code
-                            if "```python" in download_code:
-                                download_code = "\n".join(
-                                    line for line in download_code.split("\n")
-                                    if not line.strip().startswith("```python") and not line.strip() == "```"
-                                ).strip()
-                            elif "```typescript" in download_code:
-                                download_code = "\n".join(
-                                    line for line in download_code.split("\n")
-                                    if not line.strip().startswith("```typescript") and not line.strip() == "```"
-                                ).strip()
-                            elif "```java" in download_code:
-                                download_code = "\n".join(
-                                    line for line in download_code.split("\n")
-                                    if not line.strip().startswith("```java") and not line.strip() == "```"
-                                ).strip()
-                            
-                            # Add download button in the first column
-                            with col1:
-                                timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-                                extension = FRAMEWORK_EXTENSIONS[st.session_state.code_generation_persona]
-                                framework_name = FRAMEWORK_NAMES[st.session_state.code_generation_persona]
-                                
-                                # Convert code to base64
-                                code_bytes = download_code.encode('utf-8')
-                                code_b64 = base64.b64encode(code_bytes).decode()
-                                
-                                # Create custom download link
-                                download_link = f'''
-                                    <a href="data:text/plain;base64,{code_b64}" 
-                                       download="promptwright-generated-code-{timestamp}{extension}" 
-                                       class="download-button" 
-                                       style="text-decoration:none; width:100%; display:inline-block; text-align:center;">
-                                       📥 Download {framework_name} Code
-                                    </a>
-                                '''
-                                st.markdown(download_link, unsafe_allow_html=True)
-                            
-                            # Add New Task button in the second column
-                            with col2:
-                                if st.button("🔄 Start New Task", key="new_task_button_bottom", use_container_width=True, type="primary", on_click=clear_task_input):
-                                    code_section.empty()
-                                    button_section.empty()
-                                    gif_section.empty()
-                                    st.rerun()
-                    
-                        # Display the recording after code generation
-                        with gif_section:
-                            st.markdown("### Task Execution Recording")
-                            with open(gif_path, "rb") as f:
-                                gif_contents = f.read()
-                            gif_base64 = base64.b64encode(gif_contents).decode()
-                            st.markdown(f"""
-                                <div style='background-color: #2D2D2D; padding: 20px; border-radius: 10px; margin: 20px 0; border: 1px solid #E86C52; width: 100%;'>
-                                    <img src='data:image/gif;base64,{gif_base64}' style='width: 100%; border-radius: 8px; display: block;'>
-                                </div>
-                            """, unsafe_allow_html=True)
-                except Exception as e:
-                    # Update status with error message
-                    status_placeholder.error(f"❌ Error during code generation: {str(e)}")
-                    logger.error(f"Error details: {type(e).__name__} - {str(e)}")
-                    show_new_task_button()
-                    st.stop()
-                    
-        except Exception as e:
-            # Update status with error message
-            status_placeholder.error(f"❌ Error during execution: {str(e)}")
-            logger.error(f"Error details: {type(e).__name__} - {str(e)}")
-            show_new_task_button()
-            st.stop()
+            # Convert code to base64 (the output alphabet is ASCII, so skip UTF-8 decoding)
+            code_b64 = base64.b64encode(generated_code.strip().encode('utf-8')).decode('ascii')
             
+            # Create custom download link
+            download_link = f'''
+                <a href="data:text/plain;base64,{code_b64}" 
+                   download="promptwright-generated-code-{paths.timestamp}{extension}" 
+                   class="download-button" 
+                   style="text-decoration:none; width:100%; display:inline-block; text-align:center;">
+                   📥 Download {framework_name} Code
+                </a>
+            '''
+            st.markdown(download_link, unsafe_allow_html=True)
+        
+        # Add New Task button in the second column
+        with col2:
+            _new_task_button("new_task_button_bottom", code_section, button_section, gif_section)
+    
+    # Display the recording after code generation
+    if gif_read is None:
+        return
+    with gif_section:
+        st.markdown("### Task Execution Recording")
+        # The recording was read while the code streamed; Streamlit serves it as-is instead of inlining base64
+        with st.container(key="task-recording"):
+            st.image(gif_read.result(), use_container_width=True)
+
+if submitted and task:
+    # The task runs with this session's settings, whatever other sessions pushed meanwhile
+    _apply_settings(force=True)
+    
+    # Initialize task failure flag
+    st.session_state.task_failed = False
+    
+    # Create placeholders for status messages and for notices about how the task ran
+    status_placeholder = st.empty()
+    notice_placeholder = st.empty()
+    
+    # Create containers in the desired display order but don't populate them yet
+    code_section = st.container()
+    button_section = st.container()
+    gif_section = st.container()
+    
+    # Resolve the selected framework once for the whole submit
+    persona = st.session_state.code_generation_persona
+    
+    # Execute browser task
+    result = execute_browser_task(task, status_placeholder, st.session_state.get("force_fresh_run", False))
+    
+    # If task failed, show only the New Task button and stop
+    if result is None:
+        _show_new_task_button(code_section, button_section, gif_section)
+        st.stop()
+    
+    # Build this task's file paths once; later stages and the elements table read them from here
+    paths = TaskPaths.for_task(result.history_path, result.timestamp)
+    st.session_state.current_task_paths = paths
+    
+    # A reused run performed no browser actions, which matters for tasks with side effects
+    if result.from_cache:
+        notice_placeholder.info(
+            "♻️ Reused the browser run of an identical earlier task, so no browser actions were performed. "
+            "Tick **Force a fresh browser run** and submit again to run it in the browser."
+        )
+    elif result.timed_out:
+        notice_placeholder.warning(
+            "⏱️ The browser task was stopped at its time limit before it finished. The generated test "
+            "only covers the steps completed so far; raise AGENT_DEADLINE_S to give tasks more time."
+        )
+    
+    # Run the remaining stages in order; the first failure reports which one broke
+    stage = "history cleaning"
+    try:
+        cleaned_history, cleaned_history_json = _clean_history(paths, status_placeholder)
+        
+        # Read the recording while the code streams so it is ready as soon as generation finishes;
+        # there is none when recording is disabled
+        gif_read = _run_in_background(paths.gif.read_bytes) if paths.gif.exists() else None
+        
+        stage = "code generation"
+        generated_code = _generate_code(persona, cleaned_history, cleaned_history_json, paths, status_placeholder, code_section)
+        
+        if generated_code is not None:
+            stage = "output rendering"
+            _render_outputs(persona, generated_code, paths, gif_read, status_placeholder, code_section, button_section, gif_section, partial=result.timed_out)
     except Exception as e:
         # Update status with error message
-        status_placeholder.error(f"❌ Error during code generation: {str(e)}")
+        status_placeholder.error(f"❌ Error during {stage}: {str(e)}")
         logger.error(f"Error details: {type(e).__name__} - {str(e)}")
-        show_new_task_button()
+        _show_new_task_button(code_section, button_section, gif_section)
         st.stop()
         
     # Clear only the status placeholder after everything is done
     status_placeholder.empty()
 
+@st.cache_data(show_spinner=False, ttl=60)
+def _find_latest_elements_file(history_folder: str, history_mtime_ns: int) -> Path | None:
+    """Find the most recent elements file across all timestamp folders; cached until the history folder changes"""
+    elements_files = []
+    for timestamp_dir in Path(history_folder).glob('*'):
+        if timestamp_dir.is_dir():
+            elements_files.extend(timestamp_dir.glob('elements_*.json'))
+    if not elements_files:
+        return None
+    return max(elements_files, key=lambda x: x.stat().st_mtime)
+
+@st.cache_data(show_spinner=False)
+def _load_elements_table(path: str, mtime_ns: int, size: int):
+    """Parse an elements file into its raw data and an Arrow table; cached per file version"""
+    import orjson
+    import pyarrow as pa
+
+    elements_data = orjson.loads(Path(path).read_bytes())
+
+    # Build the columns directly instead of a list of row dicts
+    elements = [
+        element for element in elements_data.get('interacted_elements', ())
+        if element and isinstance(element, dict)
+    ]
+    if not elements:
+        return elements_data, None
+
+    # Arrow table with a numbering column starting from 1
+    elements_table = pa.table({
+        'No.': range(1, len(elements) + 1),
+        'XPath': [element.get('xpath', '') for element in elements],
+        'CSS': [element.get('css_selector', '') for element in elements]
+    })
+    return elements_data, elements_table
+
+def _csv_bytes(table):
+    """Serialize an Arrow table straight into a CSV byte buffer for download"""
+    from pyarrow import csv as pa_csv
+    buf = io.BytesIO()
+    pa_csv.write_csv(table, buf)
+    return buf.getvalue()
+
+def _write_csv_export(table) -> str:
+    """Stream a large Arrow table to a statically served CSV file and return its URL"""
+    import secrets
+    from pyarrow import csv as pa_csv
+    _EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    # Every large export writes a new file; drop the ones old enough to have been downloaded
+    expired = time.time() - EXPORT_MAX_AGE_SECONDS
+    for old_export in _EXPORTS_DIR.glob("*.csv"):
+        try:
+            if old_export.stat().st_mtime < expired:
+                old_export.unlink()
+        except OSError:
+            # Removed concurrently by another session
+            pass
+    # Static files are served without authentication, so the name must not be guessable;
+    # the random token also keeps exports made in the same second apart
+    file_name = f"interacted-elements-{secrets.token_urlsafe(16)}.csv"
+    # Arrow's CSV writer encodes in batches, so the full text is never held in memory
+    pa_csv.write_csv(table, str(_EXPORTS_DIR / file_name))
+    return f"app/static/exports/{file_name}"
+
+@st.cache_data(show_spinner=False)
+def _build_elements_csv(path: str, mtime_ns: int, size: int) -> bytes:
+    """CSV bytes for an elements file, serialized once per file version instead of on every rerun"""
+    _, elements_table = _load_elements_table(path, mtime_ns, size)
+    return _csv_bytes(elements_table)
+
 # Display elements grid in a separate section outside the code generation block
 if submitted and task:
     st.divider()
     st.subheader("🔍 Interacted Elements")
     
     try:
-        # Get all elements files from all timestamp folders
-        history_folder = Path(os.path.join(os.path.dirname(__file__), "..", "history"))
-        elements_files = []
-        for timestamp_dir in history_folder.glob('*'):
-            if timestamp_dir.is_dir():
-                elements_files.extend(timestamp_dir.glob('elements_*.json'))
+        # Use the elements file of the task that just ran, only scanning history as a fallback
+        task_paths = st.session_state.get("current_task_paths")
+        latest_elements_file = task_paths.elements if task_paths is not None else None
+        if latest_elements_file is None or not latest_elements_file.exists():
+            history_mtime_ns = _HISTORY_DIR.stat().st_mtime_ns if _HISTORY_DIR.exists() else 0
+            latest_elements_file = _find_latest_elements_file(str(_HISTORY_DIR), history_mtime_ns)
         
-        if not elements_files:
+        if latest_elements_file is None:
             st.info("No elements files found in history folder")
         else:
-            # Get the most recent elements file
-            latest_elements_file = max(elements_files, key=lambda x: x.stat().st_mtime)
-            
-            # Load the elements data
-            with open(latest_elements_file, 'r') as f:
-                elements_data = json.load(f)
-            
-            # Create simple list for display
-            elements_list = []
-            for element in elements_data.get('interacted_elements', []):
-                if element and isinstance(element, dict):
-                    elements_list.append({
-                        'XPath': element.get('xpath', ''),
-                        'CSS': element.get('css_selector', '')
-                    })
+            # Parse the elements file once per version; reruns reuse the cached table
+            elements_stat = latest_elements_file.stat()
+            elements_key = (str(latest_elements_file), elements_stat.st_mtime_ns, elements_stat.st_size)
+            elements_data, elements_table = _load_elements_table(*elements_key)
             
-            if elements_list:
+            if elements_table is not None:
                 # Store elements list in session state
-                st.session_state.current_elements_list = elements_list
-
-                # Convert elements_list to a DataFrame and reset the index
-                elements_df = pd.DataFrame(elements_list).reset_index(drop=True)
-
-                # Add a column for the index starting from 1
-                elements_df.index = elements_df.index + 1
-                elements_df.index.name = 'No.'
+                st.session_state.current_elements_list = elements_table.select(['XPath', 'CSS']).to_pylist()
 
                 # Create columns for the download and table display
                 col1, col2 = st.columns([1, 3])
                 
                 with col1:
-                    # Generate download link without causing refresh
-                    if elements_list:
-                        st.markdown(get_csv_download_link(elements_df), unsafe_allow_html=True)
-
-                # Display the DataFrame with the index in the expander
+                    # Offer the CSV download without causing refresh
+                    csv_file_name = f"interacted-elements-{time.strftime('%Y%m%d-%H%M%S')}.csv"
+                    if elements_table.nbytes > LARGE_EXPORT_BYTES:
+                        # Too big to hold in memory for the websocket; link to a streamed file instead
+                        export_url = _write_csv_export(elements_table)
+                        st.markdown(
+                            f'<a href="{export_url}" download="{csv_file_name}" class="download-button">📥 Download Elements CSV</a>',
+                            unsafe_allow_html=True
+                        )
+                    else:
+                        st.download_button(
+                            label="📥 Download Elements CSV",
+                            data=_build_elements_csv(*elements_key),
+                            file_name=csv_file_name,
+                            mime="text/csv",
+                            on_click="ignore",
+                            use_container_width=True
+                        )
+
+                # Display the Arrow table in the expander
                 with st.expander("Interacted Elements Table"):
-                    st.table(elements_df)
+                    st.dataframe(elements_table, hide_index=True, use_container_width=True)
             else:
                 st.warning("No elements found in the data")
             
@@ -1292,15 +1465,5 @@ if submitted and task:
 
 else:
     # Show some example tasks
-    st.markdown("""
-    <div class="example-tasks">
-        <h3>Example Tasks</h3>
-        <ol>
-            <li>Visit https://thinking-tester-contact-list.herokuapp.com/, login with 'testronai.com@gmail.com' as username and 'password' as password and submit. Then click 'Add a New Contact', fill in the contact form with random Indian-style data, and verify the contact details are correctly displayed in the table. Then logout from the application.</li>
-            <li>Go to https://thinking-tester-contact-list.herokuapp.com/ and enter using any random funny username  and password and do not submit the form.</li>
-            <li>Go to google.com and search for 'testronai', and open the first link which has the word testronai in it.</li>
-            <li>Go to testronai.com and click on watch demo button</li>
-        </ol>
-    </div>
-    """, unsafe_allow_html=True) 
+    st.markdown(_EXAMPLE_TASKS_HTML, unsafe_allow_html=True) 
     
\ No newline at end of file
@@ -0,0 +1,72 @@
+import logging
+from browser_use.browser.browser import Browser, BrowserConfig
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+class BrowserPool:
+    """
+    Keep launched local browsers alive between tasks so back-to-back tasks skip
+    the Chromium startup.
+
+    Each Agent run still gets its own fresh browser context; only the browser
+    process is shared. Remote (CDP/WSS) browsers are never pooled because an
+    idle connection keeps a cloud session open. All methods must be awaited on
+    the event loop the browsers were launched on.
+    """
+
+    def __init__(self, max_idle: int = 2):
+        self.max_idle = max_idle
+        self._idle: dict[str, list[Browser]] = {}
+
+    @staticmethod
+    def _key(config: BrowserConfig) -> str:
+        # BrowserConfig is an unhashable dataclass, but its repr covers every field
+        return repr(config)
+
+    @staticmethod
+    def _is_remote(config: BrowserConfig) -> bool:
+        return bool(config.cdp_url or config.wss_url)
+
+    def _idle_count(self) -> int:
+        return sum(len(browsers) for browsers in self._idle.values())
+
+    async def acquire(self, config: BrowserConfig) -> Browser:
+        """
+        Get an idle browser launched with the same configuration, or a new one
+
+        Args:
+            config: Browser configuration for the task
+
+        Returns:
+            Browser: A browser that is not in use by any other task
+        """
+        idle = self._idle.get(self._key(config), [])
+        while idle:
+            browser = idle.pop()
+            if browser.playwright_browser is not None and browser.playwright_browser.is_connected():
+                logger.debug("Reusing pooled browser")
+                return browser
+            # The browser process died while idle; drop it
+            await browser.close()
+        return Browser(config=config)
+
+    async def release(self, browser: Browser, discard: bool = False) -> None:
+        """
+        Return a browser after its task finished, closing it if it can't be kept
+
+        Args:
+            browser: Browser previously returned by acquire
+            discard: Close the browser instead of pooling it, e.g. after a failed task
+        """
+        if discard or self._is_remote(browser.config) or self._idle_count() >= self.max_idle:
+            await browser.close()
+            return
+        self._idle.setdefault(self._key(browser.config), []).append(browser)
+
+    async def shutdown(self) -> None:
+        """Close every idle browser"""
+        for browsers in self._idle.values():
+            for browser in browsers:
+                await browser.close()
+        self._idle.clear()
@@ -1,74 +1,177 @@
-import os
+import asyncio
+import hashlib
+import shutil
+import sys
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from dotenv import load_dotenv, find_dotenv
-from langchain_openai import ChatOpenAI, AzureChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
+from types import MappingProxyType
 from browser_use import Agent
-from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.browser import BrowserConfig
 from browser_use.agent.views import AgentHistoryList
 import logging
-from services.config_manager import ConfigManager
+from services.config_manager import ConfigManager, PROVIDER_API_KEYS
+from services.task_cache import TaskCache
+from services.browser_pool import BrowserPool
 from datetime import datetime
-from utils.logger_config import setup_logger
-from utils.file_utils import FileUtils
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Project root directory (two levels up from this file) and the history directory inside it
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+HISTORY_DIR = PROJECT_ROOT / 'history'
+# Set through the config manager so its merged snapshot sees the value
+ConfigManager().set_config('HISTORY_DIR', str(HISTORY_DIR))
+
+# Remote browser providers: API key setting, BrowserConfig URL parameter, URL template and display name
+CLOUD_BROWSER_ENDPOINTS = MappingProxyType({
+    'browserbase': ('BROWSERBASE_API_KEY', 'cdp_url', "wss://connect.browserbase.com?apiKey={api_key}", "Browserbase"),
+    'steeldev': ('STEELDEV_API_KEY', 'cdp_url', "wss://connect.steel.dev?apiKey={api_key}", "Steel.dev"),
+    'browserless': ('BROWSERLESS_API_KEY', 'wss_url', "wss://production-sfo.browserless.io/chromium/playwright?token={api_key}", "Browserless"),
+    'lightpanda': ('LIGHTPANDA_API_KEY', 'cdp_url', "wss://cloud.lightpanda.io/ws?token={api_key}", "Lightpanda"),
+})
+
+# LLM client builders by provider. Provider SDKs are imported inside each builder so only
+# the configured provider's SDK is ever loaded.
+def _build_anthropic(model_name: str, api_key: str, config_manager: ConfigManager):
+    logger.info("Using Anthropic configuration")
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(model=model_name, anthropic_api_key=api_key, temperature=0.7)
+
+def _build_azure(model_name: str, api_key: str, config_manager: ConfigManager):
+    logger.info("Using Azure OpenAI configuration")
+    from langchain_openai import AzureChatOpenAI
+    azure_endpoint = config_manager.get_config('AZURE_OPENAI_ENDPOINT')
+    deployment_name = config_manager.get_config('AZURE_DEPLOYMENT_NAME')
+    api_version = config_manager.get_config('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
+    
+    logger.info("Azure OpenAI Endpoint: %s", azure_endpoint)
+    logger.info("Azure Deployment Name: %s", deployment_name)
+    
+    return AzureChatOpenAI(
+        api_version=api_version,
+        azure_deployment=deployment_name,
+        azure_endpoint=azure_endpoint,
+        api_key=api_key,
+        temperature=0.7,
+        max_tokens=None,
+        timeout=None,
+        model_name=deployment_name
+    )
+
+def _build_deepseek(model_name: str, api_key: str, config_manager: ConfigManager):
+    logger.info("Using DeepSeek configuration")
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model_name, api_key=api_key, openai_api_base="https://api.deepseek.com/v1", temperature=0.7)
+
+def _build_groq(model_name: str, api_key: str, config_manager: ConfigManager):
+    logger.info("Using Groq configuration")
+    from langchain_groq import ChatGroq
+    return ChatGroq(model=model_name, api_key=api_key, temperature=0.7)
+
+def _build_google(model_name: str, api_key: str, config_manager: ConfigManager):
+    logger.info("Using Google configuration")
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(model=model_name, google_api_key=api_key, temperature=0.7)
+
+def _build_openai(model_name: str, api_key: str, config_manager: ConfigManager):
+    logger.info("Using OpenAI configuration")
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model_name, api_key=api_key, temperature=0.7)
+
+LLM_BUILDERS = MappingProxyType({
+    'anthropic': _build_anthropic,
+    'azure': _build_azure,
+    'deepseek': _build_deepseek,
+    'groq': _build_groq,
+    'google': _build_google,
+    'openai': _build_openai,
+})
+
 class BrowserTaskExecutionError(Exception):
     """Custom exception for browser task execution failures"""
     pass
 
+@dataclass(frozen=True, slots=True)
+class TaskRunResult:
+    """Outcome of one browser task"""
+    history_path: str
+    timestamp: str
+    # The history was copied from an identical earlier run; no browser actions were performed
+    from_cache: bool = False
+    # The run hit AGENT_DEADLINE_S and the history only holds the steps taken until then
+    timed_out: bool = False
+
 class BrowserTaskRunner:
     def __init__(self):
-        # Load .env file without clearing existing environment variables
-        load_dotenv(find_dotenv(), override=True)
-        
-        # Get the project root directory (two levels up from this file)
-        project_root = Path(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        
-        # Set history directory to be in the project root
-        self.history_folder = project_root / 'history'
-        os.environ['HISTORY_DIR'] = str(self.history_folder)
-        
-        # Check history directory setup
-        logger.info(f"\n=== History Directory Configuration ===")
-        logger.info(f"HISTORY_DIR environment variable: {self.history_folder}")
-        logger.info(f"HISTORY_DIR exists: {Path(self.history_folder).exists()}")
-        if Path(self.history_folder).exists():
-            logger.info(f"HISTORY_DIR permissions: {oct(Path(self.history_folder).stat().st_mode)[-3:]}")
-            logger.info(f"HISTORY_DIR owner: {Path(self.history_folder).owner()}")
-            logger.info(f"HISTORY_DIR group: {Path(self.history_folder).group()}")
-        logger.info("=====================================\n")
+        # History directory in the project root
+        self.history_folder = HISTORY_DIR
+        
+        logger.info("HISTORY_DIR: %s", self.history_folder)
+        
+        # Check history directory setup; stat/owner/group are only worth their syscalls when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n=== History Directory Configuration ===")
+            logger.debug("HISTORY_DIR exists: %s", self.history_folder.exists())
+            if self.history_folder.exists():
+                logger.debug("HISTORY_DIR permissions: %s", oct(self.history_folder.stat().st_mode)[-3:])
+                logger.debug("HISTORY_DIR owner: %s", self.history_folder.owner())
+                logger.debug("HISTORY_DIR group: %s", self.history_folder.group())
+            logger.debug("=====================================\n")
         
         # Initialize config manager
         self.config_manager = ConfigManager()
         
-        # Initialize browser configuration
-        browser_config = self._get_browser_config()
-        logger.debug(f"Final Browser Config: {browser_config}")
-        self.browser = Browser(config=browser_config)
+        # Histories of earlier tasks, reused when the same task is run again
+        self.task_cache = TaskCache(self.history_folder / 'task_cache.db')
+        
+        # LLM clients by configuration, so tasks reuse their HTTP connection pools
+        self._llm_cache = {}
+        
+        # Browser configs by settings, so unchanged settings skip rebuilding them
+        self._browser_config_cache = {}
+        
+        # Runs in progress by task cache key, so identical concurrent tasks share one run
+        self._in_flight = {}
+        
+        # Launched local browsers kept alive between tasks
+        self.browser_pool = BrowserPool(max_idle=int(self.config_manager.get_config('BROWSER_POOL_SIZE', '2')))
         
         # Debug logging
         logger.debug("BrowserTaskRunner initialized")
     def _get_browser_config(self) -> BrowserConfig:
         """
-        Configure and return browser settings based on latest configuration
+        Return browser settings for the latest configuration, reusing the config built for the same settings
         """
         # Get latest settings from config manager
         self.browser_type = self.config_manager.get_config('BROWSER_TYPE', 'local').lower()
         self.cloud_provider = self.config_manager.get_config('BROWSER_CLOUD_PROVIDER', '').lower()
         
-        logger.debug(f"Configuring browser with type: {self.browser_type}")
-        
         # Get headless mode from environment variable, default to True
         headless_mode = self.config_manager.get_config('BROWSER_HEADLESS', 'true').lower() == 'true'
         
+        # Every setting the config is built from is part of the key, so changed settings get a new config
+        cache_key = (self.browser_type, self.cloud_provider, headless_mode)
+        if self.browser_type == 'remote' and self.cloud_provider in CLOUD_BROWSER_ENDPOINTS:
+            api_key = self.config_manager.get_config(CLOUD_BROWSER_ENDPOINTS[self.cloud_provider][0]) or ''
+            cache_key += (hashlib.sha256(api_key.encode()).hexdigest(),)
+        
+        browser_config = self._browser_config_cache.get(cache_key)
+        if browser_config is None:
+            browser_config = self._build_browser_config(headless_mode)
+            self._browser_config_cache[cache_key] = browser_config
+        return browser_config
+
+    def _build_browser_config(self, headless_mode: bool) -> BrowserConfig:
+        """
+        Configure and return browser settings based on latest configuration
+        """
+        logger.debug("Configuring browser with type: %s", self.browser_type)
+        
         # Add prominent console log for headless mode
         logger.info("\n" + "="*50)
-        logger.info(f"🎭 Browser Headless Mode: {'ON' if headless_mode else 'OFF'}")
+        logger.info("🎭 Browser Headless Mode: %s", 'ON' if headless_mode else 'OFF')
         logger.info("="*50 + "\n")
         
         config_params = {
@@ -77,63 +180,41 @@ class BrowserTaskRunner:
             'highlight_elements': False
         }
         
-        logger.info("\n=== Browser Configuration Details ===")
-        logger.info(f"Browser Type: {self.browser_type}")
-        logger.info(f"Cloud Provider: {self.cloud_provider}")
-        logger.info(f"Headless Mode: {headless_mode}")
-        logger.debug(f"Initial config_params: {config_params}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n=== Browser Configuration Details ===")
+            logger.debug("Browser Type: %s", self.browser_type)
+            logger.debug("Cloud Provider: %s", self.cloud_provider)
+            logger.debug("Headless Mode: %s", headless_mode)
+            logger.debug("Initial config_params: %s", config_params)
         
         if self.browser_type == 'remote':
-            logger.debug(f"Setting up remote browser with provider: {self.cloud_provider}")
+            logger.debug("Setting up remote browser with provider: %s", self.cloud_provider)
             
             if not self.cloud_provider:
                 error_msg = "BROWSER_CLOUD_PROVIDER is not set but BROWSER_TYPE is remote"
                 logger.error(error_msg)
                 raise ValueError(error_msg)
             
+            if self.cloud_provider not in CLOUD_BROWSER_ENDPOINTS:
+                logger.error("Unsupported cloud provider: %s", self.cloud_provider)
+                raise ValueError(f"Unsupported cloud provider: {self.cloud_provider}")
+            
             # Remove local browser settings when using remote
             config_params.pop('headless', None)
             config_params.pop('disable_security', None)
             
-            if self.cloud_provider == 'browserbase':
-                api_key = self.config_manager.get_config('BROWSERBASE_API_KEY')
-                if not api_key:
-                    raise ValueError("BROWSERBASE_API_KEY not found in environment variables")
-                config_params['cdp_url'] = f"wss://connect.browserbase.com?apiKey={api_key}"
-                logger.info("Using Browserbase CDP URL")
-            
-            elif self.cloud_provider == 'steeldev':
-                api_key = self.config_manager.get_config('STEELDEV_API_KEY')
-                if not api_key:
-                    raise ValueError("STEELDEV_API_KEY not found in environment variables")
-                config_params['cdp_url'] = f"wss://connect.steel.dev?apiKey={api_key}"
-                logger.info("Using Steel.dev CDP URL")
-            
-            elif self.cloud_provider == 'browserless':
-                api_key = self.config_manager.get_config('BROWSERLESS_API_KEY')
-                if not api_key:
-                    raise ValueError("BROWSERLESS_API_KEY not found in environment variables")
-                config_params['wss_url'] = f"wss://production-sfo.browserless.io/chromium/playwright?token={api_key}"
-                logger.info("Using Browserless WSS URL")
-            
-            elif self.cloud_provider == 'lightpanda':
-                api_key = self.config_manager.get_config('LIGHTPANDA_API_KEY')
-                if not api_key:
-                    raise ValueError("LIGHTPANDA_API_KEY not found in environment variables")
-                config_params['cdp_url'] = f"wss://cloud.lightpanda.io/ws?token={api_key}"
-                logger.info("Using Lightpanda CDP URL")
-            
-            else:
-                logger.error(f"Unsupported cloud provider: {self.cloud_provider}")
-                raise ValueError(f"Unsupported cloud provider: {self.cloud_provider}")
+            api_key_name, url_param, url_template, label = CLOUD_BROWSER_ENDPOINTS[self.cloud_provider]
+            api_key = self.config_manager.get_config(api_key_name)
+            if not api_key:
+                raise ValueError(f"{api_key_name} not found in environment variables")
+            config_params[url_param] = url_template.format(api_key=api_key)
+            logger.info("Using %s %s", label, 'CDP URL' if url_param == 'cdp_url' else 'WSS URL')
             
-            logger.debug("\nFinal Remote Config Parameters:")
-            masked_params = config_params.copy()
-            if 'cdp_url' in masked_params:
-                masked_params['cdp_url'] = masked_params['cdp_url'].split('?')[0] + '?apiKey=***'
-            if 'wss_url' in masked_params:
-                masked_params['wss_url'] = masked_params['wss_url'].split('?token=')[0] + '?token=***'
-            logger.debug(masked_params)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\nFinal Remote Config Parameters:")
+                masked_params = config_params.copy()
+                masked_params[url_param] = url_template.format(api_key='***')
+                logger.debug(masked_params)
         else:
             logger.debug("\nUsing Local Browser Configuration:")
             logger.debug(config_params)
@@ -142,331 +223,312 @@ class BrowserTaskRunner:
 
     def get_llm(self):
         """
-        Configure and return the appropriate LLM based on latest settings
+        Return the LLM client for the latest settings, reusing the one built for the same configuration
         """
         # Get latest settings from config manager
         self.model_provider = self.config_manager.get_config('MODEL_PROVIDER', 'openai').lower()
         self.model_name = self.config_manager.get_config('MODEL_NAME', 'gpt-4')
         
-        logger.info("\n=== LLM Configuration ===")
-        logger.info(f"Model Provider: {self.model_provider}")
-        logger.info(f"Model Name: {self.model_name}")
-        
-        if self.model_provider == 'anthropic':
-            logger.info("Using Anthropic configuration")
-            return ChatAnthropic(
-                model=self.model_name,
-                anthropic_api_key=self.config_manager.get_config('ANTHROPIC_API_KEY'),
-                temperature=0.7
-            )
-        elif self.model_provider == 'azure':
-            logger.info("Using Azure OpenAI configuration")
-            azure_endpoint = self.config_manager.get_config('AZURE_OPENAI_ENDPOINT')
-            deployment_name = self.config_manager.get_config('AZURE_DEPLOYMENT_NAME')
-            api_version = self.config_manager.get_config('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
-            api_key = self.config_manager.get_config('AZURE_OPENAI_API_KEY')
-            
-            logger.info(f"Azure OpenAI Endpoint: {azure_endpoint}")
-            logger.info(f"Azure Deployment Name: {deployment_name}")
-            
-            return AzureChatOpenAI(
-                api_version=api_version,
-                azure_deployment=deployment_name,
-                azure_endpoint=azure_endpoint,
-                api_key=api_key,
-                temperature=0.7,
-                max_tokens=None,
-                timeout=None,
-                model_name=deployment_name
-            )
-        elif self.model_provider == 'deepseek':
-            logger.info("Using DeepSeek configuration")
-            return ChatOpenAI(
-                model=self.model_name,
-                api_key=self.config_manager.get_config('DEEPSEEK_API_KEY'),
-                openai_api_base="https://api.deepseek.com/v1",
-                temperature=0.7
-            )
-        elif self.model_provider == 'groq':
-            logger.info("Using Groq configuration")
-            return ChatGroq(
-                model=self.model_name,
-                api_key=self.config_manager.get_config('GROQ_API_KEY'),
-                temperature=0.7
-            )
-        elif self.model_provider == 'google':
-            logger.info("Using Google configuration")
-            return ChatGoogleGenerativeAI(
-                model=self.model_name,
-                google_api_key=self.config_manager.get_config('GOOGLE_API_KEY'),
-                temperature=0.7
-            )
-        else:
-            logger.info("Using OpenAI configuration")
-            return ChatOpenAI(
-                model=self.model_name,
-                api_key=self.config_manager.get_config('OPENAI_API_KEY'),
-                temperature=0.7
+        # Any setting the client is built from is part of the key, so changed settings get a new client
+        api_key = self.config_manager.get_config(PROVIDER_API_KEYS.get(self.model_provider, 'OPENAI_API_KEY')) or ''
+        cache_key = (self.model_provider, self.model_name, hashlib.sha256(api_key.encode()).hexdigest())
+        if self.model_provider == 'azure':
+            cache_key += (
+                self.config_manager.get_config('AZURE_OPENAI_ENDPOINT'),
+                self.config_manager.get_config('AZURE_DEPLOYMENT_NAME'),
+                self.config_manager.get_config('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
             )
+        
+        llm = self._llm_cache.get(cache_key)
+        if llm is None:
+            llm = self._build_llm()
+            self._llm_cache[cache_key] = llm
+        return llm
+
+    def _build_llm(self):
+        """
+        Configure and return the appropriate LLM based on latest settings
+        """
+        logger.info("\n=== LLM Configuration ===")
+        logger.info("Model Provider: %s", self.model_provider)
+        logger.info("Model Name: %s", self.model_name)
+        
+        # Unknown providers fall back to OpenAI
+        provider = self.model_provider if self.model_provider in LLM_BUILDERS else 'openai'
+        api_key = self.config_manager.get_config(PROVIDER_API_KEYS[provider])
+        return LLM_BUILDERS[provider](self.model_name, api_key, self.config_manager)
 
-    async def execute_task(self, task: str) -> tuple[str, str]:
+    async def execute_task(self, task: str, bypass_cache: bool = False) -> TaskRunResult:
         """
         Execute a browser task and return the path to generated history file and timestamp
         
         Args:
             task: The task description to execute
+            bypass_cache: Run the browser even if an identical task was run before; BYPASS_CACHE
+                turns this on for every task
             
         Returns:
-            tuple[str, str]: Path to the generated history.json file and the timestamp used
+            TaskRunResult: Path to the generated history.json file, the timestamp used, whether
+                the run was reused from the task cache and whether it was cut off by the deadline
             
         Raises:
             BrowserTaskExecutionError: If the task execution fails for any reason
         """
         # Get latest settings from config manager
         use_vision = self.config_manager.get_config('USE_VISION', 'false').lower() == 'true'
+        bypass_cache = bypass_cache or self.config_manager.get_config('BYPASS_CACHE', 'false').lower() == 'true'
+        model_provider = self.config_manager.get_config('MODEL_PROVIDER', 'openai').lower()
+        model_name = self.config_manager.get_config('MODEL_NAME', 'gpt-4')
         conversation_path = self.config_manager.get_config('CONVERSATION_LOG_PATH', 'logs/conversation.json')
+        max_steps = int(self.config_manager.get_config('AGENT_MAX_STEPS', '20'))
+        deadline = float(self.config_manager.get_config('AGENT_DEADLINE_S', '120'))
+        record_gif = self.config_manager.get_config('RECORD_GIF', 'true').lower() == 'true'
         
-        logger.debug(f"use_vision is set to: {use_vision}")
-        logger.debug(f"conversation_path is set to: {conversation_path}")
-        
-        # Create history folder if it doesn't exist
-        logger.info(f"History folder absolute path: {self.history_folder}")
-        logger.info(f"History folder exists: {self.history_folder.exists()}")
-        logger.info(f"History folder parent exists: {self.history_folder.parent.exists()}")
-        
-        try:
-            self.history_folder.mkdir(exist_ok=True)
-            logger.info(f"Successfully created history folder at {self.history_folder}")
-            logger.info(f"History folder permissions: {FileUtils.get_file_permissions(self.history_folder)}")
-            logger.info(f"History folder owner: {FileUtils.get_file_owner(self.history_folder)}")
-        except Exception as e:
-            logger.error(f"Failed to create history folder: {str(e)}")
-            logger.error(f"Current process user ID: {os.getuid()}")
-            logger.error(f"Current process group ID: {os.getgid()}")
-            raise BrowserTaskExecutionError(f"Failed to create history folder: {str(e)}")
+        logger.debug("use_vision is set to: %s", use_vision)
+        logger.debug("conversation_path is set to: %s", conversation_path)
         
         # Generate timestamp for unique filename and folder
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
         timestamp_folder = self.history_folder / timestamp
+        
+        # Create the history and timestamp folders with a single call, off the event loop;
+        # the agent's own writes report any permission problem
         try:
-            timestamp_folder.mkdir(exist_ok=True)
-            logger.info(f"Created timestamp folder: {timestamp_folder}")
-            logger.info(f"Timestamp folder permissions: {FileUtils.get_file_permissions(timestamp_folder)}")
-            logger.info(f"Timestamp folder owner: {FileUtils.get_file_owner(timestamp_folder)}")
-            
-            # Ensure timestamp folder has write permissions
-            timestamp_folder.chmod(0o755)
-            logger.info(f"Updated timestamp folder permissions to 755")
-            
-        except Exception as e:
-            logger.error(f"Failed to create or set permissions on timestamp folder: {str(e)}")
-            logger.error(f"Current process user ID: {os.getuid()}")
-            logger.error(f"Current process group ID: {os.getgid()}")
+            await asyncio.to_thread(timestamp_folder.mkdir, mode=0o755, parents=True, exist_ok=True)
+            logger.info("Created timestamp folder: %s", timestamp_folder)
+        except OSError as e:
+            logger.error("Failed to create timestamp folder: %s", e)
             raise BrowserTaskExecutionError(f"Failed to setup timestamp folder: {str(e)}")
         
         # Create paths with timestamp folder
         history_path = timestamp_folder / f'history_{timestamp}.json'
-        gif_path = timestamp_folder / f'recording_{timestamp}.gif'
+        gif_path = timestamp_folder / f'recording_{timestamp}.gif' if record_gif else None
         
-        # Test if we can write to the gif path
-        try:
-            logger.info(f"Testing GIF path writability: {gif_path}")
-            with open(gif_path, 'wb') as f:
-                f.write(b'test')
-            gif_path.unlink()  # Remove test file
-            logger.info("Successfully verified GIF path is writable")
-        except Exception as e:
-            logger.warning(f"GIF path is not writable, will disable recording: {str(e)}")
-            gif_path = None
-        
-        logger.info(f"Initializing agent with gif_path: {gif_path}")
-        agent = Agent(
-            task=task,
-            llm=self.get_llm(),
-            use_vision=use_vision,
-            browser=self.browser,
-            gif_filename=str(gif_path) if gif_path else None,
-            save_conversation_path=str(timestamp_folder / "conversation.json"),
+        # Identical tasks run one at a time, so a repeat arriving mid-run waits for the first
+        # run and then reuses its history
+        cache_key = self.task_cache.key(
+            task, model_provider, model_name, use_vision,
+            self.config_manager.get_config('BROWSER_TYPE', 'local'),
+            self.config_manager.get_config('BROWSER_CLOUD_PROVIDER', ''),
+            max_steps
         )
-        logger.info("Agent initialized successfully")
-        logger.info(f"Agent configuration: task={task}, use_vision={use_vision}, gif_path={gif_path}")
-
-        # Log system resource info
-        try:
-            import psutil
-            process = psutil.Process()
-            logger.info(f"Current memory usage: {process.memory_info().rss / 1024 / 1024:.2f} MB")
-            logger.info(f"CPU usage: {process.cpu_percent()}%")
-            logger.info(f"Open files: {len(process.open_files())}")
-            logger.info(f"Current working directory: {process.cwd()}")
-            logger.info(f"Process username: {process.username()}")
-        except ImportError:
-            logger.info("psutil not available for resource monitoring")
-        except Exception as e:
-            logger.error(f"Error getting resource info: {str(e)}")
-
-        try:
-            try:
-                logger.info("Starting agent.run with max_steps=50")
-                history: AgentHistoryList = await agent.run(max_steps=50)
-                logger.info("Successfully completed agent.run")
-                logger.info(f"History type: {type(history)}")
-                logger.info(f"History content available: {history is not None}")
-                if history:
-                    logger.info(f"History steps recorded: {len(history.history) if hasattr(history, 'history') else 'unknown'}")
-            except OSError as e:
-                if str(e) == 'cannot open resource' and gif_path:
-                    logger.warning("Resource error occurred with GIF recording, retrying without recording...")
-                else:
-                    logger.error(f"Agent task execution failed with OSError: {str(e)}")
-                    raise
-            except Exception as e:
-                logger.error(f"Agent task execution failed: {str(e)}")
-                logger.error(f"Error type: {type(e).__name__}")
-                logger.error(f"Error args: {e.args}")
-                # Clean up the timestamp folder since task failed
-                if timestamp_folder.exists():
-                    logger.info(f"Cleaning up timestamp folder: {timestamp_folder}")
-                    self.safe_cleanup_directory(timestamp_folder)
-                raise BrowserTaskExecutionError(f"Task execution failed: {str(e)}")
-            
-            logger.info("Checking for recording file")
-            # Extract actual timestamp from the gif_path that was created
-            actual_timestamp = None
-            recording_files = list(Path(self.history_folder).glob('*/recording_*.gif'))
-            logger.info(f"Found {len(recording_files)} recording files")
-            for file in recording_files:
-                if file.exists():
-                    actual_timestamp = file.parent.name
-                    logger.info(f"Found recording file with timestamp: {actual_timestamp}")
-                    break
+        async with self._single_flight(None if bypass_cache else cache_key):
+            # Reuse the history of an identical earlier task instead of running the agent again
+            # The cache is SQLite and the copy is file I/O, so both run off the event loop
+            cached_history_path = None if bypass_cache else await asyncio.to_thread(self.task_cache.get, cache_key)
+            if cached_history_path is not None:
+                await asyncio.to_thread(self._copy_cached_run, cached_history_path, history_path, gif_path)
+                return TaskRunResult(str(history_path), timestamp, from_cache=True)
+        
+            # Get a browser matching the latest settings; the runner itself is long-lived and
+            # may serve tasks with different browser configurations
+            browser_config = self._get_browser_config()
+            logger.debug("Final Browser Config: %s", browser_config)
             
-            if actual_timestamp and actual_timestamp != timestamp:
-                logger.info(f"Timestamps don't match. Original: {timestamp}, Actual: {actual_timestamp}")
-                # If timestamps don't match, move files to correct folder
-                new_folder = self.history_folder / actual_timestamp
-                logger.info(f"Creating new folder: {new_folder}")
-                if not new_folder.exists():
-                    new_folder.mkdir(exist_ok=True)
-                    logger.info(f"Created new folder with permissions: {FileUtils.get_file_permissions(new_folder)}")
-                
-                # Move history file if it exists
-                if history_path.exists():
-                    logger.info(f"Moving history file to new location")
-                    new_history_path = new_folder / f'history_{actual_timestamp}.json'
-                    history_path.rename(new_history_path)
-                    history_path = new_history_path
-                    logger.info(f"History file moved to: {new_history_path}")
+            async with self._task_environment(browser_config, timestamp_folder) as browser:
+                logger.info("Initializing agent with gif_path: %s", gif_path)
+                agent = Agent(
+                    task=task,
+                    llm=self.get_llm(),
+                    use_vision=use_vision,
+                    browser=browser,
+                    generate_gif=gif_path is not None,
+                    gif_filename=str(gif_path) if gif_path else None,
+                    save_conversation_path=str(timestamp_folder / "conversation.json"),
+                )
+                logger.info("Agent initialized successfully")
                 
-                # Delete old folder if empty
-                if timestamp_folder.exists() and not any(timestamp_folder.iterdir()):
-                    logger.info("Removing empty timestamp folder")
-                    timestamp_folder.rmdir()
+                if model_provider == 'anthropic':
+                    self._enable_prompt_caching(agent)
+                logger.info("Agent configuration: task=%s, use_vision=%s, gif_path=%s", task, use_vision, gif_path)
                 
-                timestamp = actual_timestamp
-                logger.info("File reorganization complete")
-            
-            # Save history to file using the correct timestamp
-            try:
-                logger.info(f"Attempting to save history to file: {history_path}")
-                logger.info(f"History file parent folder exists: {Path(history_path).parent.exists()}")
-                logger.info(f"History file parent folder permissions: {FileUtils.get_file_permissions(Path(history_path).parent)}")
+                # Log system resource info
+                if logger.isEnabledFor(logging.DEBUG):
+                    self._log_resource_usage()
                 
-                # Try to create an empty file first to test write permissions
-                try:
-                    Path(history_path).touch()
-                    logger.info("Successfully created empty history file")
-                except Exception as touch_error:
-                    logger.error(f"Failed to create empty history file: {str(touch_error)}")
-                    raise BrowserTaskExecutionError(f"Failed to create empty history file: {str(touch_error)}")
-
-                # Try to write some test content
-                try:
-                    with open(history_path, 'w') as f:
-                        f.write('{"test": "content"}')
-                    logger.info("Successfully wrote test content to history file")
-                except Exception as write_error:
-                    logger.error(f"Failed to write test content: {str(write_error)}")
-                    raise BrowserTaskExecutionError(f"Failed to write test content: {str(write_error)}")
-
-                # Now try to save the actual history
+                timed_out = False
                 try:
-                    agent.save_history(str(history_path))
-                    logger.info("Successfully called agent.save_history")
-                except Exception as save_error:
-                    logger.error(f"Failed in agent.save_history: {str(save_error)}")
-                    logger.error(f"Save error type: {type(save_error)}")
-                    logger.error(f"Save error args: {save_error.args}")
-                    raise BrowserTaskExecutionError(f"Failed in agent.save_history: {str(save_error)}")
+                    logger.info("Starting agent.run with max_steps=%s", max_steps)
+                    history: AgentHistoryList = await asyncio.wait_for(agent.run(max_steps=max_steps), timeout=deadline)
+                    logger.info("Successfully completed agent.run")
+                    logger.info("History steps recorded: %s", len(history.history))
+                except asyncio.TimeoutError:
+                    # Keep the steps taken so far; the agent records each step in its history as it goes
+                    logger.warning("Agent run exceeded %ss, saving the partial history", deadline)
+                    timed_out = True
+                except OSError as e:
+                    if str(e) != 'cannot open resource' or not gif_path:
+                        raise BrowserTaskExecutionError(f"Task execution failed: {str(e)}") from e
+                    logger.warning("Resource error occurred with GIF recording, continuing without recording")
+                except Exception as e:
+                    raise BrowserTaskExecutionError(f"Task execution failed: {str(e)}") from e
                 
-                if Path(history_path).exists():
-                    logger.info(f"Successfully saved history file at {history_path}")
-                    logger.info(f"History file permissions: {FileUtils.get_file_permissions(Path(history_path))}")
-                    logger.info(f"History file size: {Path(history_path).stat().st_size} bytes")
-                    
-                    # Try to read the file back to verify it's readable
-                    try:
-                        with open(history_path, 'r') as f:
-                            content = f.read()
-                            logger.info(f"Successfully read back history file, content length: {len(content)}")
-                    except Exception as read_error:
-                        logger.error(f"Failed to read back history file: {str(read_error)}")
-                else:
-                    logger.error(f"History file was not created at {history_path}")
-                    raise BrowserTaskExecutionError("Failed to create history file")
-                    
-            except Exception as e:
-                logger.error(f"Failed to save history file: {str(e)}")
-                logger.error(f"Current working directory: {os.getcwd()}")
-                logger.error(f"Process effective user ID: {os.geteuid()}")
-                logger.error(f"Process effective group ID: {os.getegid()}")
-                logger.error(f"Parent directory listing:")
+                # The agent writes the recording to the exact gif_filename it was given,
+                # so only that file needs checking rather than every earlier run's folder
+                if gif_path and not gif_path.exists():
+                    logger.info("No recording was written to %s", gif_path)
+                
+                # Save the agent history off the event loop; save_history raises if the file can't be written
+                logger.info("Attempting to save history to file: %s", history_path)
                 try:
-                    for item in Path(history_path).parent.iterdir():
-                        logger.error(f"  {item.name}: {FileUtils.get_file_permissions(item)}")
-                except Exception as list_error:
-                    logger.error(f"Failed to list parent directory: {str(list_error)}")
-                raise BrowserTaskExecutionError(f"Failed to save history file: {str(e)}")
+                    await asyncio.to_thread(agent.save_history, str(history_path))
+                except Exception as e:
+                    raise BrowserTaskExecutionError(f"Failed to save history file: {str(e)}") from e
+                logger.info("Successfully saved history file at %s", history_path)
             
-            return str(history_path), timestamp
+            # Only a run that finished its task without errors is worth reusing; a partial,
+            # failed or step-limited run would otherwise be replayed for every identical task
+            if not timed_out and agent.history.is_done() and not agent.history.has_errors():
+                await asyncio.to_thread(self.task_cache.set, cache_key, history_path)
+            return TaskRunResult(str(history_path), timestamp, timed_out=timed_out)
+
+    async def execute_tasks(self, tasks: list[str]) -> list[TaskRunResult | BaseException]:
+        """
+        Execute several browser tasks concurrently, each with its own browser
+        
+        Args:
+            tasks: The task descriptions to execute
             
+        Returns:
+            list: For each task, its TaskRunResult or the exception it raised
+        """
+        return await asyncio.gather(*(self.execute_task(task) for task in tasks), return_exceptions=True)
+
+    async def shutdown(self) -> None:
+        """Close the browsers kept alive between tasks"""
+        await self.browser_pool.shutdown()
+
+    @asynccontextmanager
+    async def _single_flight(self, key: str | None):
+        """
+        Hold the only run of a task with this cache key; later identical tasks wait until it finishes
+        
+        Args:
+            key: Task cache key, or None to run without coalescing
+        """
+        if key is None:
+            yield
+            return
+        while key in self._in_flight:
+            logger.info("Waiting for an identical task that is already running")
+            await asyncio.wait([self._in_flight[key]])
+        finished = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = finished
+        try:
+            yield
         finally:
-            await self.browser.close()
+            del self._in_flight[key]
+            finished.set_result(None)
+
+    @asynccontextmanager
+    async def _task_environment(self, browser_config: BrowserConfig, timestamp_folder: Path):
+        """
+        Lease a pooled browser for one agent run and roll back if the run fails
+        
+        On success the browser goes back to the pool. On any failure it is closed and the
+        task's timestamp folder is removed, so a failed run leaves nothing behind.
+        
+        Args:
+            browser_config: Browser configuration for the task
+            timestamp_folder: Folder holding the task's output files
+        """
+        browser = await self.browser_pool.acquire(browser_config)
+        try:
+            yield browser
+        except BaseException as e:
+            logger.error("Task failed, rolling back: %s (%s)", e, type(e).__name__)
+            await self.browser_pool.release(browser, discard=True)
+            if timestamp_folder.exists():
+                logger.info("Cleaning up timestamp folder: %s", timestamp_folder)
+                self.safe_cleanup_directory(timestamp_folder)
+            raise
+        await self.browser_pool.release(browser)
+
+    @staticmethod
+    def _log_resource_usage() -> None:
+        """Log memory, CPU and open-file usage of this process when psutil is available"""
+        try:
+            import psutil
+            process = psutil.Process()
+            logger.debug("Current memory usage: %.2f MB", process.memory_info().rss / 1024 / 1024)
+            logger.debug("CPU usage: %s%%", process.cpu_percent())
+            logger.debug("Open files: %s", len(process.open_files()))
+            logger.debug("Current working directory: %s", process.cwd())
+            logger.debug("Process username: %s", process.username())
+        except ImportError:
+            logger.debug("psutil not available for resource monitoring")
+        except Exception as e:
+            logger.error("Error getting resource info: %s", e)
+
+    def _enable_prompt_caching(self, agent: Agent) -> None:
+        """
+        Mark the agent's system prompt as an Anthropic prompt-caching breakpoint
+        
+        The system prompt and action schema are identical on every step, so caching
+        them lets each step after the first read that prefix at the cached rate.
+        
+        Args:
+            agent: Agent whose message history was just initialized
+        """
+        try:
+            system_message = agent.message_manager.history.messages[0].message
+        except (AttributeError, IndexError):
+            logger.warning("Agent message history not available, prompt caching not enabled")
+            return
+        
+        if isinstance(system_message.content, str):
+            system_message.content = [{
+                "type": "text",
+                "text": system_message.content,
+                "cache_control": {"type": "ephemeral"}
+            }]
+            logger.debug("Enabled prompt caching for the agent system prompt")
 
-    async def close(self):
-        """Close the browser instance"""
-        await self.browser.close()
+    def _copy_cached_run(self, cached_history_path: Path, history_path: Path, gif_path: Path | None) -> None:
+        """
+        Copy a cached run's history and recording into the new task's timestamp folder
+        
+        Args:
+            cached_history_path: History file of the earlier run
+            history_path: Destination history file for this task
+            gif_path: Destination recording file for this task, or None when recording is disabled
+        """
+        logger.info("Reusing cached history from %s", cached_history_path)
+        try:
+            shutil.copyfile(cached_history_path, history_path)
+            cached_gif = gif_path and next(cached_history_path.parent.glob('recording_*.gif'), None)
+            if cached_gif:
+                shutil.copyfile(cached_gif, gif_path)
+        except OSError as e:
+            raise BrowserTaskExecutionError(f"Failed to reuse cached history: {str(e)}")
 
     def safe_cleanup_directory(self, dir_path: Path) -> None:
+        """
+        Remove a task folder inside the history folder, logging anything that can't be removed
+        
+        Args:
+            dir_path: Folder to remove; the history folder itself and paths outside it are refused
+        """
         try:
             # Ensure we're working with an absolute path
             dir_path = dir_path.resolve()
-            logger.info(f"Cleaning up directory (absolute path): {dir_path}")
-            
-            if not dir_path.exists():
-                logger.info(f"Directory does not exist, skipping cleanup: {dir_path}")
-                return
             
-            # Verify this is a subdirectory of the history folder
-            if not str(dir_path).startswith(str(self.history_folder)):
-                logger.error(f"Attempted to clean directory outside history folder: {dir_path}")
+            # Verify this is a subdirectory of the history folder; the folder itself also holds the task cache
+            if dir_path == self.history_folder or not dir_path.is_relative_to(self.history_folder):
+                logger.error("Attempted to clean directory outside history folder: %s", dir_path)
                 return
             
-            logger.info(f"Cleaning up directory: {dir_path}")
-            for item in dir_path.iterdir():
-                try:
-                    if item.is_file():
-                        item.unlink()
-                        logger.info(f"Removed file: {item}")
-                    elif item.is_dir():
-                        self.safe_cleanup_directory(item)
-                except Exception as e:
-                    logger.warning(f"Failed to remove {item}: {str(e)}")
-            
-            try:
-                dir_path.rmdir()
-                logger.info(f"Removed directory: {dir_path}")
-            except Exception as e:
-                logger.warning(f"Failed to remove directory {dir_path}: {str(e)}")
+            logger.info("Cleaning up directory: %s", dir_path)
+            # onerror is deprecated since Python 3.12 in favour of onexc, which gets the exception itself
+            if sys.version_info >= (3, 12):
+                shutil.rmtree(dir_path, onexc=self._log_cleanup_error)
+            else:
+                shutil.rmtree(dir_path, onerror=lambda function, path, exc_info: self._log_cleanup_error(function, path, exc_info[1]))
         except Exception as e:
-            logger.warning(f"Error during cleanup of {dir_path}: {str(e)}")
\ No newline at end of file
+            logger.warning("Error during cleanup of %s: %s", dir_path, e)
+
+    @staticmethod
+    def _log_cleanup_error(function, path, exc: BaseException) -> None:
+        # A missing folder needs no cleanup; anything else is logged and skipped
+        if not isinstance(exc, FileNotFoundError):
+            logger.warning("Failed to remove %s: %s", path, exc)
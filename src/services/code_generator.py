@@ -1,20 +1,62 @@
-import json
+import asyncio
+import hashlib
+import orjson
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv, find_dotenv
-from typing import Generator
-from langchain_openai import ChatOpenAI, AzureChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import AsyncGenerator, Generator
 from langchain.schema import HumanMessage, SystemMessage
-from services.config_manager import ConfigManager
+from services.config_manager import ConfigManager, PROVIDER_API_KEYS
+from services.response_cache import ResponseCache
+from utils.chunk_batcher import ChunkBatcher
 import logging
-from utils.logger_config import setup_logger
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Placeholder in prompt templates replaced with the cleaned history
+HISTORY_PLACEHOLDER = '{json_file_content}'
+
+@lru_cache(maxsize=8)
+def _load_template(path: str, mtime_ns: int) -> tuple[str, str, str]:
+    """Read a prompt template split around the history placeholder; cached until the file's modification time changes"""
+    return Path(path).read_text(encoding='utf-8').partition(HISTORY_PLACEHOLDER)
+
+def _read_prompt_template(prompt_template_path: str) -> tuple[str, str, str]:
+    """Return the prompt template as (prefix, placeholder, suffix), reading the file only when it has changed"""
+    path = Path(prompt_template_path)
+    return _load_template(str(path), path.stat().st_mtime_ns)
+
+def _fill_template(template_parts: tuple[str, str, str], history_content: str) -> str:
+    """Insert the cleaned history into a prompt template split by _read_prompt_template"""
+    prefix, placeholder, suffix = template_parts
+    if not placeholder:
+        return prefix
+    return "".join((prefix, history_content, suffix))
+
+# Streamed chunks are passed on in batches of at least this many characters, or after this
+# long since the last batch; the first chunk is passed on immediately
+STREAM_BATCH_CHARS = 64
+STREAM_BATCH_SECONDS = 0.05
+
+# Streaming LLM clients by configuration, shared by all generators so requests reuse
+# their HTTP connection pools
+_llm_clients = {}
+
+# Thread that reads the prompt template while the history is prepared
+_prelude_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="codegen-prelude")
+
+# Attributes of interacted elements saved to the elements file
+ELEMENT_KEYS = ('tag_name', 'xpath', 'attributes', 'css_selector', 'entire_parent_branch_path')
+
+# System prompt sent with every generation request
+SYSTEM_PROMPT = "You are a Playwright TypeScript code generator. Generate only the code with no additional text."
+
+# The system message is never modified, so every request sends this same instance
+SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
 class CodeGenerator:
     def __init__(self):
         # Initialize config manager
@@ -24,81 +66,100 @@ class CodeGenerator:
         self.model_provider = self.config_manager.get_config('MODEL_PROVIDER', 'openai').lower()
         self.model_name = self.config_manager.get_config('MODEL_NAME', 'gpt-4')
         
+        # Earlier responses, reused when the same prompt is sent to the same model again
+        self.bypass_cache = self.config_manager.get_config('BYPASS_CACHE', 'false').lower() == 'true'
+        self.response_cache = ResponseCache(self.config_manager.get_config('RESPONSE_CACHE_PATH', '~/.cache/promptwright/llm_responses.db'))
+        
         # Debug logging
         logger.debug("CodeGenerator initialized with:")
-        logger.debug(f"Model Provider: {self.model_provider}")
-        logger.debug(f"Model Name: {self.model_name}")
+        logger.debug("Model Provider: %s", self.model_provider)
+        logger.debug("Model Name: %s", self.model_name)
 
-    def extract_interacted_elements(self, cleaned_history_path: str) -> None:
+    def extract_interacted_elements(self, cleaned_history_path: str, history_data: dict = None) -> None:
         """
         Extract interacted elements from cleaned history and save to a new JSON file
         
         Args:
             cleaned_history_path: Path to the cleaned history JSON file
+            history_data: Already cleaned history; read from cleaned_history_path when not given
         """
         try:
             logger.info("Starting extraction of interacted elements")
             
-            # Read the cleaned history
-            with open(cleaned_history_path, 'r') as f:
-                history_data = json.load(f)
-            logger.debug(f"Successfully loaded history data from {cleaned_history_path}")
+            # Read the cleaned history unless the caller already has it in memory
+            if history_data is None:
+                history_data = orjson.loads(Path(cleaned_history_path).read_bytes())
+                logger.debug("Successfully loaded history data from %s", cleaned_history_path)
             
             # Extract timestamp from the filename
             cleaned_history_path_str = str(cleaned_history_path)
             timestamp = cleaned_history_path_str.split('cleaned_history_')[-1].split('.json')[0]
-            logger.debug(f"Extracted timestamp: {timestamp}")
-            
-            # Initialize list to store interacted elements
-            interacted_elements = []
+            logger.debug("Extracted timestamp: %s", timestamp)
             
-            # Iterate through history and extract interacted elements
+            # Extract the required attributes of every interacted element, skipping None values
             history_entries = history_data.get('history', [])
-            logger.debug(f"Found {len(history_entries)} history entries")
-            
-            for entry in history_entries:
-                state = entry.get('state', {})
-                elements = state.get('interacted_element', [])
-                logger.debug(f"Found {len(elements)} elements in history entry")
-                
-                for element in elements:
-                    if element and isinstance(element, dict):  # Skip None values and ensure it's a dictionary
-                        # Extract required attributes
-                        element_data = {
-                            'tag_name': element.get('tag_name'),
-                            'xpath': element.get('xpath'),
-                            'attributes': element.get('attributes'),
-                            'css_selector': element.get('css_selector'),
-                            'entire_parent_branch_path': element.get('entire_parent_branch_path')
-                        }
-                        interacted_elements.append(element_data)
-                        logger.debug(f"Added element with tag {element_data['tag_name']}")
+            logger.debug("Found %s history entries", len(history_entries))
+            interacted_elements = (
+                {key: element.get(key) for key in ELEMENT_KEYS}
+                for entry in history_entries
+                for element in entry.get('state', {}).get('interacted_element') or ()
+                if type(element) is dict and element
+            )
             
             # Create output file path in the same timestamp folder as cleaned history
             history_folder = Path(cleaned_history_path).parent
             elements_file_path = history_folder / f'elements_{timestamp}.json'
             
-            # Save extracted elements to new JSON file
-            with open(elements_file_path, 'w') as f:
-                json.dump({'interacted_elements': interacted_elements}, f, indent=2)
+            # Save extracted elements to new JSON file, one element per line as it is extracted,
+            # so the element list and its serialized form are never held in memory whole
+            element_count = 0
+            with open(elements_file_path, 'wb') as elements_file:
+                elements_file.write(b'{"interacted_elements": [')
+                for element in interacted_elements:
+                    elements_file.write(b'\n  ' if element_count == 0 else b',\n  ')
+                    elements_file.write(orjson.dumps(element))
+                    element_count += 1
+                elements_file.write(b'\n]}\n' if element_count else b']}\n')
             
             # Verify the file was saved correctly
             if elements_file_path.exists():
-                logger.debug(f"Successfully saved {len(interacted_elements)} interacted elements to {elements_file_path}")
+                logger.debug("Successfully saved %s interacted elements to %s", element_count, elements_file_path)
             else:
-                logger.error(f"Failed to save elements file at {elements_file_path}")
+                logger.error("Failed to save elements file at %s", elements_file_path)
                 raise FileNotFoundError(f"Elements file was not created at {elements_file_path}")
             
         except Exception as e:
-            logger.error(f"Error extracting interacted elements: {str(e)}")
+            logger.error("Error extracting interacted elements: %s", e)
             raise
 
     def get_llm(self):
+        """
+        Return the streaming LLM client for the current settings, reusing the one built for the same configuration
+        """
+        # Any setting the client is built from is part of the key, so changed settings get a new client
+        api_key = self.config_manager.get_config(PROVIDER_API_KEYS.get(self.model_provider, 'OPENAI_API_KEY')) or ''
+        cache_key = (self.model_provider, self.model_name, hashlib.sha256(api_key.encode()).hexdigest())
+        if self.model_provider == 'azure':
+            cache_key += (
+                self.config_manager.get_config('AZURE_OPENAI_ENDPOINT'),
+                self.config_manager.get_config('AZURE_DEPLOYMENT_NAME'),
+                self.config_manager.get_config('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
+            )
+        
+        llm = _llm_clients.get(cache_key)
+        if llm is None:
+            llm = self._build_llm()
+            _llm_clients[cache_key] = llm
+        return llm
+
+    def _build_llm(self):
         """
         Configure and return the appropriate LLM based on environment settings
         """
+        # Provider SDKs are imported on first use so only the configured one is ever loaded
         if self.model_provider == 'anthropic':
             logger.info("Using Anthropic configuration")
+            from langchain_anthropic import ChatAnthropic
             return ChatAnthropic(
                 model=self.model_name,
                 anthropic_api_key=self.config_manager.get_config('ANTHROPIC_API_KEY'),
@@ -107,13 +168,14 @@ class CodeGenerator:
             )
         elif self.model_provider == 'azure':
             logger.info("Using Azure OpenAI configuration")
+            from langchain_openai import AzureChatOpenAI
             azure_endpoint = self.config_manager.get_config('AZURE_OPENAI_ENDPOINT')
             deployment_name = self.config_manager.get_config('AZURE_DEPLOYMENT_NAME')
             api_version = self.config_manager.get_config('AZURE_OPENAI_API_VERSION', '2024-08-01-preview')
             api_key = self.config_manager.get_config('AZURE_OPENAI_API_KEY')
             
-            logger.info(f"Azure OpenAI Endpoint: {azure_endpoint}")
-            logger.info(f"Azure Deployment Name: {deployment_name}")
+            logger.info("Azure OpenAI Endpoint: %s", azure_endpoint)
+            logger.info("Azure Deployment Name: %s", deployment_name)
             
             return AzureChatOpenAI(
                 api_version=api_version,
@@ -128,6 +190,7 @@ class CodeGenerator:
             )
         elif self.model_provider == 'deepseek':
             logger.info("Using DeepSeek configuration")
+            from langchain_openai import ChatOpenAI
             return ChatOpenAI(
                 model=self.model_name,
                 api_key=self.config_manager.get_config('DEEPSEEK_API_KEY'),
@@ -137,6 +200,7 @@ class CodeGenerator:
             )
         elif self.model_provider == 'groq':
             logger.info("Using Groq configuration")
+            from langchain_groq import ChatGroq
             return ChatGroq(
                 model=self.model_name,
                 api_key=self.config_manager.get_config('GROQ_API_KEY'),
@@ -146,7 +210,8 @@ class CodeGenerator:
         elif self.model_provider == 'google':
             google_api_key = self.config_manager.get_config('GOOGLE_API_KEY')
             logger.info("Using Google configuration")
-            logger.debug(f"Google API key length: {len(google_api_key) if google_api_key else 0}")
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            logger.debug("Google API key length: %s", len(google_api_key) if google_api_key else 0)
             return ChatGoogleGenerativeAI(
                 model=self.model_name,
                 api_key=google_api_key,
@@ -155,6 +220,7 @@ class CodeGenerator:
             )
         else:
             logger.info("Using OpenAI configuration")
+            from langchain_openai import ChatOpenAI
             return ChatOpenAI(
                 model=self.model_name,
                 api_key=self.config_manager.get_config('OPENAI_API_KEY'),
@@ -162,6 +228,82 @@ class CodeGenerator:
                 streaming=True
             )
 
+    @staticmethod
+    def _read_cleaned_history(cleaned_history_path: str) -> tuple[dict, str]:
+        """Read the cleaned history file once; returns it parsed and as the text sent in the prompt"""
+        logger.debug("Reading history from: %s", cleaned_history_path)
+        raw = Path(cleaned_history_path).read_bytes()
+        return orjson.loads(raw), raw.decode('utf-8')
+
+    def _prepare_history(self, cleaned_history_path: str, history_data: dict = None, history_content: str = None) -> str:
+        """
+        Get the history text for the prompt and save the interacted elements next to it
+        
+        Args:
+            cleaned_history_path: Path to the cleaned history JSON file
+            history_data: Already cleaned history; when given the cleaned history file is not read
+            history_content: history_data already serialized the same way it is saved
+            
+        Returns:
+            str: Cleaned history serialized the same way it is saved
+        """
+        # Read the cleaned history once, or serialize the in-memory copy the same way it is saved
+        # unless the caller already did
+        if history_data is None:
+            history_data, history_content = self._read_cleaned_history(cleaned_history_path)
+        elif history_content is None:
+            history_content = orjson.dumps(history_data, option=orjson.OPT_INDENT_2).decode()
+        
+        # Extract and save interacted elements
+        self.extract_interacted_elements(cleaned_history_path, history_data)
+        logger.debug("History content length: %s characters", len(history_content))
+        return history_content
+
+    def _response_key(self, template_parts: tuple[str, str, str], history_content: str) -> str:
+        """Digest identifying a generation request: the model, system prompt, template and history"""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (self.model_provider, self.model_name, SYSTEM_PROMPT, *template_parts, history_content):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _build_messages(self, template_parts: tuple[str, str, str], history_content: str) -> list:
+        """
+        Create the chat messages for a generation request
+        
+        For Anthropic the template text before the history is sent as its own content block
+        marked as a prompt-caching breakpoint, so repeated generations with the same template
+        read the system prompt and that prefix from the cache. Other providers get one plain
+        prompt; OpenAI-compatible APIs cache identical prefixes automatically.
+        
+        Args:
+            template_parts: Prompt template split around the history placeholder
+            history_content: Cleaned history JSON to insert
+            
+        Returns:
+            list: System and human messages to send to the LLM
+        """
+        prefix, placeholder, suffix = template_parts
+        use_prompt_cache = self.config_manager.get_config('USE_PROMPT_CACHE', 'true').lower() == 'true'
+        if self.model_provider == 'anthropic' and use_prompt_cache and placeholder and prefix:
+            content = [
+                {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+                {"type": "text", "text": history_content + suffix}
+            ]
+            logger.debug("Sending %s prompt characters with a cached prefix of %s", len(prefix) + len(history_content) + len(suffix), len(prefix))
+            return [SYSTEM_MESSAGE, HumanMessage(content=content)]
+        
+        final_prompt = _fill_template(template_parts, history_content)
+        logger.debug("Final prompt length: %s characters", len(final_prompt))
+        
+        # Log the final prompt
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("\n=== Final Prompt Sent to %s LLM ===", self.model_provider.upper())
+            logger.debug(final_prompt)
+            logger.debug("=== End of Prompt ===\n")
+        
+        return [SYSTEM_MESSAGE, HumanMessage(content=final_prompt)]
+
     def generate_typescript_code(self, cleaned_history_path: str, prompt_template_path: str) -> str:
         """
         Generate TypeScript code using the configured LLM based on cleaned history and prompt template
@@ -173,107 +315,192 @@ class CodeGenerator:
         Returns:
             str: Generated TypeScript code
         """
-        # First extract and save interacted elements
-        self.extract_interacted_elements(cleaned_history_path)
-        
-        # Read the cleaned history
-        with open(cleaned_history_path, 'r') as f:
-            history_content = f.read()
+        # Read the cleaned history once, then extract and save interacted elements from it
+        history_data, history_content = self._read_cleaned_history(cleaned_history_path)
+        self.extract_interacted_elements(cleaned_history_path, history_data)
             
-        # Read the prompt template
-        with open(prompt_template_path, 'r') as f:
-            prompt_template = f.read()
+        # Read the prompt template, unless it is unchanged since it was last read
+        template_parts = _read_prompt_template(prompt_template_path)
             
-        # Replace placeholder in prompt with history content
-        final_prompt = prompt_template.replace('{json_file_content}', history_content)
-        
-        # Log the final prompt
-        logger.debug(f"\n=== Final Prompt Sent to {self.model_provider.upper()} LLM ===")
-        logger.debug(final_prompt)
-        logger.debug("=== End of Prompt ===\n")
+        # Reuse the response to an identical earlier request
+        response_key = self._response_key(template_parts, history_content)
+        cached_response = None if self.bypass_cache else self.response_cache.get(response_key)
+        if cached_response is not None:
+            return cached_response
         
         # Get LLM instance
         llm = self.get_llm()
         
-        # Create messages
-        messages = [
-            SystemMessage(content="You are a Playwright TypeScript code generator. Generate only the code with no additional text."),
-            HumanMessage(content=final_prompt)
-        ]
+        # Create messages with the history inserted into the prompt template
+        messages = self._build_messages(template_parts, history_content)
         
         # Get response
         response = llm.invoke(messages)
+        self.response_cache.set(response_key, response.content)
         return response.content
 
-    def generate_typescript_code_stream(self, cleaned_history_path: str, prompt_template_path: str) -> Generator[str, None, None]:
+    def generate_typescript_code_stream(self, cleaned_history_path: str, prompt_template_path: str, history_data: dict = None, history_content: str = None) -> Generator[str, None, None]:
         """
         Generate TypeScript code using configured LLM with streaming
         
         Args:
             cleaned_history_path: Path to the cleaned history JSON file
             prompt_template_path: Path to the prompt template file
+            history_data: Already cleaned history; when given the cleaned history file is not read,
+                so it may still be being written
+            history_content: history_data already serialized the same way it is saved, so it
+                isn't serialized again for the prompt
             
         Yields:
             str: Chunks of generated TypeScript code
         """
         try:
-            logger.info(f"\n=== Starting Code Generation Process using {self.model_provider.upper()} ===")
+            logger.info("\n=== Starting Code Generation Process using %s ===", self.model_provider.upper())
             
-            # First extract and save interacted elements
-            self.extract_interacted_elements(cleaned_history_path)
+            # Read the prompt template in the background; it doesn't depend on the history, which
+            # is prepared on this thread meanwhile
+            logger.debug("Reading prompt template from: %s", prompt_template_path)
+            template_future = _prelude_executor.submit(_read_prompt_template, prompt_template_path)
             
-            # Read the cleaned history
-            logger.debug(f"Reading history from: {cleaned_history_path}")
-            with open(cleaned_history_path, 'r') as f:
-                history_content = f.read()
-            logger.debug(f"History content length: {len(history_content)} characters")
-                
-            # Read the prompt template
-            logger.debug(f"Reading prompt template from: {prompt_template_path}")
-            with open(prompt_template_path, 'r') as f:
-                prompt_template = f.read()
-            logger.debug(f"Prompt template length: {len(prompt_template)} characters")
+            history_content = self._prepare_history(cleaned_history_path, history_data, history_content)
                 
-            # Replace placeholder in prompt with history content
-            final_prompt = prompt_template.replace('{json_file_content}', history_content)
-            logger.debug(f"Final prompt length: {len(final_prompt)} characters")
-            
-            # Log the final prompt
-            logger.debug(f"\n=== Final Prompt Sent to {self.model_provider.upper()} LLM ===")
-            logger.debug(final_prompt)
-            logger.debug("=== End of Prompt ===\n")
+            # Wait for the prompt template
+            template_parts = template_future.result()
             
-            # Get LLM instance
+            # Reuse the response to an identical earlier request, sent as a single chunk
+            response_key = self._response_key(template_parts, history_content)
+            cached_response = None if self.bypass_cache else self.response_cache.get(response_key)
+            if cached_response is not None:
+                yield cached_response
+                return
+                
+            # Get LLM instance, only now that the request has to be sent
             llm = self.get_llm()
             
-            # Create messages
-            messages = [
-                SystemMessage(content="You are a Playwright TypeScript code generator. Generate only the code with no additional text."),
-                HumanMessage(content=final_prompt)
-            ]
+            # Create messages with the history inserted into the prompt template
+            messages = self._build_messages(template_parts, history_content)
             
-            logger.info(f"Calling {self.model_provider.upper()} API with streaming enabled...")
+            logger.info("Calling %s API with streaming enabled...", self.model_provider.upper())
             
-            # Stream the response
-            total_content = ""
-            chunk_count = 0
+            # Stream the response, coalescing the model's small chunks into batches
+            batcher = ChunkBatcher(STREAM_BATCH_CHARS, STREAM_BATCH_SECONDS)
             
             for chunk in llm.stream(messages):
-                chunk_content = chunk.content
-                total_content += chunk_content
-                chunk_count += 1
-                yield chunk_content
+                batch = batcher.feed(chunk.content)
+                if batch is not None:
+                    yield batch
+            
+            batch = batcher.flush()
+            if batch is not None:
+                yield batch
             
-            logger.info(f"\n=== Code Generation Complete ===")
-            logger.debug(f"Total chunks received: {chunk_count}")
-            logger.debug(f"Total content length: {len(total_content)}")
+            logger.info("\n=== Code Generation Complete ===")
             
-            logger.debug("\n=== Generated TypeScript Code ===")
-            logger.debug(total_content)
-            logger.debug("\n=== End of Generated Code ===\n")
+            # Only a response streamed to the end is cached
+            total_content = batcher.text
+            self.response_cache.set(response_key, total_content)
+            
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Total chunks received: %s", len(batcher.chunks))
+                logger.debug("Total content length: %s", len(total_content))
+                
+                logger.debug("\n=== Generated TypeScript Code ===")
+                logger.debug(total_content)
+                logger.debug("\n=== End of Generated Code ===\n")
             
         except Exception as e:
-            logger.error(f"\n=== Error in Code Generation ===")
-            logger.error(f"Error type: {type(e).__name__}")
-            logger.error(f"Error message: {str(e)}")
-            raise 
\ No newline at end of file
+            logger.error("\n=== Error in Code Generation ===")
+            logger.error("Error type: %s", type(e).__name__)
+            logger.error("Error message: %s", e)
+            raise
+
+    async def generate_typescript_code_astream(self, cleaned_history_path: str, prompt_template_path: str, history_data: dict = None, history_content: str = None) -> AsyncGenerator[str, None]:
+        """
+        Generate TypeScript code using configured LLM with streaming, without blocking the event loop
+        
+        File access runs in worker threads and the response is streamed with the LLM's async API,
+        so many generations can share one event loop.
+        
+        Args:
+            cleaned_history_path: Path to the cleaned history JSON file
+            prompt_template_path: Path to the prompt template file
+            history_data: Already cleaned history; when given the cleaned history file is not read,
+                so it may still be being written
+            history_content: history_data already serialized the same way it is saved, so it
+                isn't serialized again for the prompt
+            
+        Yields:
+            str: Chunks of generated TypeScript code
+        """
+        try:
+            logger.info("\n=== Starting Async Code Generation Process using %s ===", self.model_provider.upper())
+            
+            # Read the prompt template, unless it is unchanged since it was last read
+            logger.debug("Reading prompt template from: %s", prompt_template_path)
+            template_parts = await asyncio.to_thread(_read_prompt_template, prompt_template_path)
+            
+            history_content = await asyncio.to_thread(self._prepare_history, cleaned_history_path, history_data, history_content)
+            
+            # Reuse the response to an identical earlier request, sent as a single chunk
+            response_key = self._response_key(template_parts, history_content)
+            cached_response = None if self.bypass_cache else await asyncio.to_thread(self.response_cache.get, response_key)
+            if cached_response is not None:
+                yield cached_response
+                return
+            
+            # Get LLM instance; building a new client may import its SDK, so keep it off the loop
+            llm = await asyncio.to_thread(self.get_llm)
+            
+            # Create messages with the history inserted into the prompt template
+            messages = self._build_messages(template_parts, history_content)
+            
+            logger.info("Calling %s API with async streaming enabled...", self.model_provider.upper())
+            
+            # Stream the response, coalescing the model's small chunks into batches
+            batcher = ChunkBatcher(STREAM_BATCH_CHARS, STREAM_BATCH_SECONDS)
+            
+            async for chunk in llm.astream(messages):
+                batch = batcher.feed(chunk.content)
+                if batch is not None:
+                    yield batch
+            
+            batch = batcher.flush()
+            if batch is not None:
+                yield batch
+            
+            logger.info("\n=== Async Code Generation Complete ===")
+            
+            # Only a response streamed to the end is cached
+            total_content = batcher.text
+            await asyncio.to_thread(self.response_cache.set, response_key, total_content)
+            logger.debug("Total chunks received: %s", len(batcher.chunks))
+            logger.debug("Total content length: %s", len(total_content))
+            
+        except Exception as e:
+            logger.error("\n=== Error in Async Code Generation ===")
+            logger.error("Error type: %s", type(e).__name__)
+            logger.error("Error message: %s", e)
+            raise
+
+    async def _agenerate_one(self, cleaned_history_path: str, prompt_template_path: str) -> str:
+        """Generate the complete code for one history with the async streaming API"""
+        return "".join([chunk async for chunk in self.generate_typescript_code_astream(cleaned_history_path, prompt_template_path)])
+
+    async def generate_typescript_code_batch(self, paths: list[tuple[str, str]]) -> list[str]:
+        """
+        Generate TypeScript code for several histories concurrently
+        
+        All requests share the same cached LLM client, so they reuse its connection pool
+        instead of each paying for its own connection setup.
+        
+        Args:
+            paths: Pairs of cleaned history path and prompt template path
+            
+        Returns:
+            list[str]: Generated TypeScript code, in the same order as paths
+        """
+        logger.info("Generating code for %s histories concurrently", len(paths))
+        return await asyncio.gather(*[
+            self._agenerate_one(cleaned_history_path, prompt_template_path)
+            for cleaned_history_path, prompt_template_path in paths
+        ])
@@ -2,11 +2,22 @@ import os
 import json
 from dotenv import load_dotenv, find_dotenv
 import logging
+from types import MappingProxyType
 from urllib.parse import urlparse
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Config key holding the API key for each model provider
+PROVIDER_API_KEYS = MappingProxyType({
+    "openai": "OPENAI_API_KEY",
+    "azure": "AZURE_OPENAI_API_KEY",
+    "anthropic": "ANTHROPIC_API_KEY",
+    "deepseek": "DEEPSEEK_API_KEY",
+    "groq": "GROQ_API_KEY",
+    "google": "GOOGLE_API_KEY"
+})
+
 class ConfigManager:
     _instance = None
     _initialized = False
@@ -21,40 +32,59 @@ class ConfigManager:
             # Load .env file without clearing existing environment variables
             load_dotenv(find_dotenv(), override=True)
             self._runtime_config = {}
+            # Environment merged with runtime config and post-processed; rebuilt after any change
+            self._merged = None
+            # Bumped on every change, so callers can tell whether anyone changed the config since they last did
+            self.version = 0
             self._initialized = True
             logger.debug("ConfigManager initialized")
 
     def set_config(self, key: str, value: str):
         """Set a configuration value that takes precedence over .env"""
+        if key in self._runtime_config and self._runtime_config[key] == value and os.environ.get(key) == str(value):
+            return
         self._runtime_config[key] = value
         # Also update environment variable for compatibility
         os.environ[key] = str(value)
-        logger.debug(f"Config set: {key}={self._mask_value(key, value)}")
+        self._merged = None
+        self.version += 1
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Config set: {key}={self._mask_value(key, value)}")
 
-    def get_config(self, key: str, default: str = None) -> str:
-        """Get configuration value, prioritizing runtime config over .env"""
-        value = self._runtime_config.get(key, os.getenv(key, default))
+    def _build_merged(self) -> dict:
+        """Merge the environment with runtime config and apply the per-key clean-ups once"""
+        merged = {**os.environ, **self._runtime_config}
         
         # Special handling for CODE_GENERATION_PERSONA to ensure valid value
-        if key == "CODE_GENERATION_PERSONA" and (not value or value.strip() == ""):
-            value = "playwright_ts_code"  # Default to TypeScript if no valid value
+        if "CODE_GENERATION_PERSONA" in merged and not merged["CODE_GENERATION_PERSONA"].strip():
+            merged["CODE_GENERATION_PERSONA"] = "playwright_ts_code"  # Default to TypeScript if no valid value
+        
+        # Clean Azure OpenAI endpoint
+        if merged.get('AZURE_OPENAI_ENDPOINT'):
+            merged['AZURE_OPENAI_ENDPOINT'] = self._clean_azure_endpoint(merged['AZURE_OPENAI_ENDPOINT'])
         
-        # Clean Azure OpenAI endpoint if that's what we're getting
-        if key == 'AZURE_OPENAI_ENDPOINT':
-            value = self._clean_azure_endpoint(value)
+        # An empty deployment name falls back to MODEL_NAME like a missing one
+        if not merged.get('AZURE_DEPLOYMENT_NAME'):
+            merged.pop('AZURE_DEPLOYMENT_NAME', None)
+        return merged
+
+    def get_config(self, key: str, default: str = None) -> str:
+        """Get configuration value, prioritizing runtime config over .env"""
+        merged = self._merged
+        if merged is None:
+            merged = self._merged = self._build_merged()
         
-        # Special handling for Azure deployment name
-        if key == 'AZURE_DEPLOYMENT_NAME':
-            # First try to get explicit deployment name
-            deployment_name = self._runtime_config.get('AZURE_DEPLOYMENT_NAME', os.getenv('AZURE_DEPLOYMENT_NAME'))
-            if deployment_name:
-                value = deployment_name
-            else:
-                # If no deployment name is set, use MODEL_NAME as fallback
-                value = self._runtime_config.get('MODEL_NAME', os.getenv('MODEL_NAME', default))
-            logger.debug(f"Using deployment name: {value}")
+        value = merged.get(key, default)
+        if key not in merged:
+            # Missing values: the persona always has a usable default and the Azure deployment
+            # name falls back to MODEL_NAME
+            if key == "CODE_GENERATION_PERSONA" and (not value or value.strip() == ""):
+                value = "playwright_ts_code"
+            elif key == 'AZURE_DEPLOYMENT_NAME':
+                value = merged.get('MODEL_NAME', default)
         
-        logger.debug(f"Config get: {key}={self._mask_value(key, value)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Config get: {key}={self._mask_value(key, value)}")
         return value
 
     def update_from_ui(self, settings: dict):
@@ -72,12 +102,13 @@ class ConfigManager:
 
     def get_config_snapshot(self) -> dict:
         """Get a snapshot of all configurations organized by category"""
+        model_provider = self.get_config("MODEL_PROVIDER", "openai")
         snapshot = {
             "Model Settings": {
-                "Provider": self.get_config("MODEL_PROVIDER", "openai"),
+                "Provider": model_provider,
                 "Model Name": self.get_config("MODEL_NAME", "gpt-4"),
                 "Use Vision": self.get_config("USE_VISION", "false"),
-                "API Key": self._mask_api_key(self.get_config(f"{self.get_config('MODEL_PROVIDER', 'openai').upper()}_API_KEY", ""))
+                "API Key": self._mask_api_key(self.get_config(PROVIDER_API_KEYS.get(model_provider, "OPENAI_API_KEY"), ""))
             },
             "Browser Settings": {
                 "Type": self.get_config("BROWSER_TYPE", "local"),
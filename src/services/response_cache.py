@@ -0,0 +1,71 @@
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    Remember the code generated for a prompt so an identical request skips the LLM call.
+
+    Entries are keyed by a digest of the model and the full prompt, expire after a time to
+    live, and the oldest entries are evicted once the cache holds more than max_entries.
+    They are stored in SQLite, so they survive restarts.
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: int = 7 * 24 * 3600, max_entries: int = 500):
+        self.db_path = Path(db_path).expanduser()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+
+    def _connect(self) -> closing:
+        return closing(sqlite3.connect(self.db_path, timeout=5))
+
+    def get(self, key: str) -> str | None:
+        """
+        Look up a cached response
+
+        Args:
+            key: Digest of the model and prompt
+
+        Returns:
+            str | None: The cached response, or None if there is none or it expired
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at >= ?",
+                (key, int(time.time()) - self.ttl_seconds)
+            ).fetchone()
+        if row is None:
+            return None
+        logger.info("Response cache hit")
+        return row[0]
+
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response, dropping expired entries and the oldest ones beyond max_entries
+
+        Args:
+            key: Digest of the model and prompt
+            response: Complete generated response
+        """
+        now = int(time.time())
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY created_at DESC, rowid DESC LIMIT ?)",
+                (self.max_entries,)
+            )
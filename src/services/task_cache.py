@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import closing
+from pathlib import Path
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+class TaskCache:
+    """
+    Remember which history file a task produced so a repeated task can reuse it
+    instead of running the browser agent again.
+
+    Tasks are matched after normalizing Unicode form and whitespace only, so a repeat
+    typed with different spacing ("go to  google.com" / "go to google.com") hits the same
+    entry. Case and punctuation are kept because they may be part of data the task types,
+    such as passwords or search strings. Entries are scoped to the model, vision, browser
+    and step limit settings that produced them, expire after a time to live, and are
+    stored in SQLite, so they survive restarts and are shared between processes using
+    the same history folder.
+    """
+
+    _WHITESPACE = re.compile(r"\s+")
+
+    def __init__(self, db_path: Path, ttl_seconds: int = 7 * 24 * 3600):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS task_cache ("
+                "hash TEXT PRIMARY KEY, history_path TEXT NOT NULL, created_at INTEGER NOT NULL)"
+            )
+
+    def _connect(self) -> closing:
+        return closing(sqlite3.connect(self.db_path, timeout=5))
+
+    @classmethod
+    def normalize_task(cls, task: str) -> str:
+        """Reduce a task description to the form used for cache lookups"""
+        task = unicodedata.normalize("NFC", task)
+        return cls._WHITESPACE.sub(" ", task).strip()
+
+    def key(self, task: str, model_provider: str, model_name: str, use_vision: bool,
+            browser_type: str, cloud_provider: str, max_steps: int) -> str:
+        """
+        Compute the cache key of a task run
+
+        Args:
+            task: The task description
+            model_provider: Provider of the model that runs the task
+            model_name: Name of the model that runs the task
+            use_vision: Whether the task runs with vision enabled
+            browser_type: Whether the task runs in a local or remote browser
+            cloud_provider: Provider of the remote browser; ignored for local browsers
+            max_steps: Step limit of the agent run
+
+        Returns:
+            str: SHA-256 hex digest identifying the normalized task and its run settings
+        """
+        browser_type = browser_type.lower()
+        cloud_provider = cloud_provider.lower() if browser_type == 'remote' else ''
+        key = (f"{self.normalize_task(task)}|{model_provider.lower()}|{model_name.lower()}|{use_vision}"
+               f"|{browser_type}|{cloud_provider}|{max_steps}")
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Path | None:
+        """
+        Look up the history file of an earlier run of the same task
+
+        Args:
+            key: Cache key from key()
+
+        Returns:
+            Path | None: The cached history file, or None if there is none, it expired or it was deleted
+        """
+        with self._connect() as conn, conn:
+            row = conn.execute(
+                "SELECT history_path FROM task_cache WHERE hash = ? AND created_at >= ?",
+                (key, int(time.time()) - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                return None
+            history_path = Path(row[0])
+            if not history_path.exists():
+                # The history folder was cleaned up since; forget the entry
+                conn.execute("DELETE FROM task_cache WHERE hash = ?", (key,))
+                return None
+        logger.info("Task cache hit: %s", history_path)
+        return history_path
+
+    def set(self, key: str, history_path: str) -> None:
+        """
+        Record the history file produced by a successful run, dropping expired entries
+
+        Args:
+            key: Cache key from key()
+            history_path: Path to the saved history JSON file
+        """
+        now = int(time.time())
+        with self._connect() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO task_cache (hash, history_path, created_at) VALUES (?, ?, ?)",
+                (key, str(history_path), now)
+            )
+            conn.execute("DELETE FROM task_cache WHERE created_at < ?", (now - self.ttl_seconds,))
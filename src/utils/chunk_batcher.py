@@ -0,0 +1,53 @@
+import time
+
+class ChunkBatcher:
+    """
+    Coalesce the small chunks streamed by an LLM into larger batches.
+
+    A batch is released once it holds max_chars characters or max_seconds have passed
+    since the previous one; the first chunk is released immediately so output starts
+    showing right away. Every chunk is also kept, so the full response can be cached.
+    """
+
+    def __init__(self, max_chars: int, max_seconds: float):
+        self.max_chars = max_chars
+        self.max_seconds = max_seconds
+        self.chunks = []
+        self._batch = []
+        self._batch_chars = 0
+        self._last_release = time.monotonic()
+
+    def feed(self, chunk: str) -> str | None:
+        """
+        Consume the next streamed chunk
+
+        Args:
+            chunk: Text as received from the LLM
+
+        Returns:
+            str | None: The batch to pass on now, or None to keep collecting
+        """
+        self.chunks.append(chunk)
+        self._batch.append(chunk)
+        self._batch_chars += len(chunk)
+
+        now = time.monotonic()
+        if len(self.chunks) == 1 or self._batch_chars >= self.max_chars or now - self._last_release >= self.max_seconds:
+            self._last_release = now
+            return self._release()
+        return None
+
+    def flush(self) -> str | None:
+        """Release whatever is still collected once the stream has ended"""
+        return self._release() if self._batch else None
+
+    def _release(self) -> str:
+        batch = "".join(self._batch)
+        self._batch.clear()
+        self._batch_chars = 0
+        return batch
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return "".join(self.chunks)
@@ -0,0 +1,76 @@
+from bisect import bisect_right
+
+class CodeFenceStripper:
+    """
+    Incrementally remove markdown code fence lines from streamed LLM output.
+
+    Each chunk is only scanned once, so the cost per chunk is proportional to the
+    chunk size rather than to the amount of code generated so far.
+    """
+
+    # Opening fences for the languages we generate; a bare ``` closes them
+    FENCE_PREFIXES = ("```python", "```typescript", "```java")
+
+    def __init__(self):
+        self._lines = []
+        # Offset in the cleaned code just past each kept line, to find lines by position
+        self._line_ends = []
+        self._partial_line = ""
+
+    @classmethod
+    def _is_fence(cls, line: str) -> bool:
+        stripped = line.strip()
+        return stripped == "```" or stripped.startswith(cls.FENCE_PREFIXES)
+
+    def _keep(self, line: str) -> None:
+        self._lines.append(line)
+        self._line_ends.append((self._line_ends[-1] if self._line_ends else 0) + len(line))
+
+    def feed(self, chunk: str) -> None:
+        """
+        Consume the next chunk of streamed output
+
+        Args:
+            chunk: Raw text as received from the LLM
+        """
+        lines = (self._partial_line + chunk).split("\n")
+        # The last piece has no newline yet and may still grow into a fence line
+        self._partial_line = lines.pop()
+        for line in lines:
+            if not self._is_fence(line):
+                self._keep(line + "\n")
+
+    def _visible_partial_line(self) -> str:
+        # A line still being streamed is held back while it may turn out to be a fence
+        return "" if self._partial_line.lstrip().startswith("`") else self._partial_line
+
+    @property
+    def text(self) -> str:
+        """Code cleaned so far, including the line still being streamed unless it may be a fence"""
+        return self.text_since(0)
+
+    def text_since(self, offset: int) -> str:
+        """
+        Code cleaned so far from a character offset on, only joining the lines at or after it
+
+        Args:
+            offset: Position in the cleaned code, e.g. the length of the part already displayed
+
+        Returns:
+            str: Cleaned code from offset on, including the line still being streamed unless it may be a fence
+        """
+        first = bisect_right(self._line_ends, offset)
+        line_start = self._line_ends[first - 1] if first else 0
+        return ("".join(self._lines[first:]) + self._visible_partial_line())[offset - line_start:]
+
+    def finish(self) -> str:
+        """
+        Flush the trailing line and return the complete cleaned code
+
+        Returns:
+            str: Generated code with fence lines removed
+        """
+        if self._partial_line and not self._is_fence(self._partial_line):
+            self._keep(self._partial_line)
+        self._partial_line = ""
+        return "".join(self._lines)
@@ -1,11 +1,39 @@
-import json
+import orjson
+import re
 from pathlib import Path
 import logging
-from utils.logger_config import setup_logger
+
+# pysimdjson is optional; without it histories are fully parsed with orjson and cleaned afterwards
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Element fields holding layout data that is blanked in cleaned histories
+COORDINATE_KEYS = frozenset(('page_coordinates', 'viewport_coordinates', 'viewport_info'))
+
+# Byte patterns for the fields blanked by a fast clean. A state's screenshot is always followed
+# by its interacted_element list, which anchors the screenshot pattern to state objects; a JSON
+# string can't contain an unescaped quote. Coordinate objects nest at most one level
+# ({"top_left": {"x": .., "y": ..}, ...}) and may be null.
+_SCREENSHOT_PATTERN = re.compile(rb'"screenshot":\s*("[^"\\]*(?:\\.[^"\\]*)*"|null)(?=\s*,\s*"interacted_element")')
+_COORDINATES_PATTERN = re.compile(rb'"(page_coordinates|viewport_coordinates|viewport_info)":\s*(?:\{(?:[^{}]|\{[^{}]*\})*\}|null)')
+
+def _blank_screenshot(match: re.Match) -> bytes:
+    """Replacement for _SCREENSHOT_PATTERN; a null screenshot stays null like in a full clean"""
+    return match.group(0) if match.group(1) == b'null' else b'"screenshot": ""'
+
+def _materialize(value):
+    """Convert a lazy simdjson value into plain Python objects"""
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
+
 class HistoryCleaner:
     @staticmethod
     def clean_history(input_path: str, output_path: str) -> str:
@@ -19,7 +47,7 @@ class HistoryCleaner:
         Returns:
             str: Path to the cleaned history file
         """
-        logger.debug(f"Starting history cleaning process for file: {input_path}")
+        logger.debug("Starting history cleaning process for file: %s", input_path)
         
         # Convert to absolute paths
         input_path = Path(input_path).resolve()
@@ -29,40 +57,197 @@ class HistoryCleaner:
         output_dir = output_path.parent
         output_dir.mkdir(exist_ok=True)
         
-        logger.info(f"Using absolute paths - Input: {input_path}, Output: {output_path}")
+        logger.info("Using absolute paths - Input: %s, Output: %s", input_path, output_path)
+        
+        # Read and clean the history file
+        history_data = HistoryCleaner.load_cleaned_history(input_path)
+        HistoryCleaner.write_cleaned_history(history_data, output_path)
+            
+        return str(output_path)
+
+    @staticmethod
+    def load_history(input_path: str) -> dict:
+        """
+        Read and parse a history JSON file.
+        
+        Args:
+            input_path: Path to the history JSON file
+            
+        Returns:
+            dict: Parsed history data
+        """
+        history_data = orjson.loads(Path(input_path).read_bytes())
+        logger.debug("Successfully loaded history data from %s", input_path)
+        return history_data
+
+    @staticmethod
+    def load_cleaned_history(input_path: str, fast: bool = False) -> dict:
+        """
+        Read a history JSON file and return it already cleaned.
+        
+        A fast clean blanks screenshots and coordinates in the raw bytes before parsing, so
+        only the small remainder is parsed. With pysimdjson installed the document is parsed
+        lazily and rebuilt from the fields that are kept, so screenshot strings and coordinate
+        objects are never converted into Python objects. Otherwise it is parsed in full and
+        cleaned with clean_history_data.
+        
+        Args:
+            input_path: Path to the history JSON file
+            fast: Blank fields with a byte-level rewrite, falling back to a full clean if the
+                rewritten document doesn't parse
+            
+        Returns:
+            dict: Cleaned history data
+        """
+        if fast:
+            history_data = HistoryCleaner._fast_clean(Path(input_path).read_bytes())
+            if history_data is not None:
+                return history_data
+        
+        if simdjson is None:
+            return HistoryCleaner.clean_history_data(HistoryCleaner.load_history(input_path))
+        
+        document = simdjson.Parser().parse(Path(input_path).read_bytes())
+        history_data = {
+            key: [HistoryCleaner._clean_lazy_entry(entry) for entry in document[key]] if key == 'history' else _materialize(document[key])
+            for key in document.keys()
+        }
+        logger.info("Cleaned %s entries in history data", len(history_data['history']))
+        return history_data
+
+    @staticmethod
+    def _fast_clean(raw: bytes) -> dict | None:
+        """
+        Blank screenshots and coordinates in raw history bytes and parse the result.
         
-        # Read the history file
-        with open(input_path, 'r') as f:
-            history_data = json.load(f)
-            logger.debug(f"Successfully loaded history data from {input_path}")
+        The rewrite is only trusted when it blanked exactly one screenshot per history step and
+        exactly the coordinate fields of the interacted elements, which is what a full clean
+        touches; otherwise a field was missed or matched outside a state.
         
-        # Clean screenshots and coordinates in each state
+        Args:
+            raw: Raw history JSON
+            
+        Returns:
+            dict | None: Cleaned history data, or None if the rewrite can't be trusted
+        """
+        raw, screenshot_count = _SCREENSHOT_PATTERN.subn(_blank_screenshot, raw)
+        raw, coordinate_count = _COORDINATES_PATTERN.subn(rb'"\1": {}', raw)
+        try:
+            history_data = orjson.loads(raw)
+        except orjson.JSONDecodeError as e:
+            logger.warning("Fast history clean produced invalid JSON, using a full clean: %s", e)
+            return None
+        
+        history = history_data.get('history', [])
+        elements = [
+            element
+            for entry in history
+            for element in (entry.get('state') or {}).get('interacted_element') or ()
+            if type(element) is dict and element
+        ]
+        expected_coordinate_count = sum(len(COORDINATE_KEYS.intersection(element)) for element in elements)
+        if (screenshot_count != len(history) or coordinate_count != expected_coordinate_count
+                or any(element[key] != {} for element in elements for key in COORDINATE_KEYS.intersection(element))):
+            logger.warning(
+                "Fast history clean matched %s screenshots for %s steps and %s coordinate fields for %s, using a full clean",
+                screenshot_count, len(history), coordinate_count, expected_coordinate_count
+            )
+            return None
+        logger.info("Cleaned %s entries in history data", len(history))
+        return history_data
+
+    @staticmethod
+    def _clean_lazy_entry(entry) -> dict:
+        """Rebuild one lazily parsed history entry without its screenshot and coordinates"""
+        cleaned_entry = {}
+        for key in entry.keys():
+            state = entry[key]
+            if key != 'state' or not isinstance(state, simdjson.Object):
+                # Not a state object; nothing in it is cleaned
+                cleaned_entry[key] = _materialize(state)
+                continue
+            cleaned_state = cleaned_entry[key] = {}
+            for state_key in state.keys():
+                if state_key == 'screenshot':
+                    # Blank like clean_history_data, which keeps a missing (null) screenshot
+                    cleaned_state[state_key] = None if state[state_key] is None else ""
+                elif state_key == 'interacted_element' and isinstance(state[state_key], simdjson.Array):
+                    cleaned_state[state_key] = [
+                        {
+                            element_key: {} if element_key in COORDINATE_KEYS else _materialize(element[element_key])
+                            for element_key in element.keys()
+                        } if isinstance(element, simdjson.Object) else element
+                        for element in state[state_key]
+                    ]
+                else:
+                    cleaned_state[state_key] = _materialize(state[state_key])
+        return cleaned_entry
+
+    @staticmethod
+    def clean_history_data(history_data: dict) -> dict:
+        """
+        Clean screenshot values and coordinate objects from loaded history data in place.
+        
+        Args:
+            history_data: Parsed history JSON
+            
+        Returns:
+            dict: The same history data, cleaned
+        """
+        # Clean screenshots and coordinates in each state; the per-entry lookups are done
+        # once and the debug check is hoisted, as this loop runs over every step of the run
+        debug = logger.isEnabledFor(logging.DEBUG)
         entry_count = 0
         for entry in history_data['history']:
             entry_count += 1
+            state = entry.get('state')
+            if not state:
+                continue
+            
             # Clean screenshots
-            if 'state' in entry and 'screenshot' in entry['state']:
-                if entry['state']['screenshot']:
-                    entry['state']['screenshot'] = ""
-                    logger.debug(f"Cleaned screenshot in entry {entry_count}")
+            if state.get('screenshot'):
+                state['screenshot'] = ""
+                if debug:
+                    logger.debug("Cleaned screenshot in entry %s", entry_count)
             
             # Clean coordinates in interacted elements
-            if 'state' in entry and 'interacted_element' in entry['state']:
-                for element in entry['state']['interacted_element']:
-                    if element and isinstance(element, dict):
-                        if 'page_coordinates' in element:
-                            element['page_coordinates'] = {}
-                        if 'viewport_coordinates' in element:
-                            element['viewport_coordinates'] = {}
-                        if 'viewport_info' in element:
-                            element['viewport_info'] = {}
-                        logger.debug(f"Cleaned coordinates in entry {entry_count}")
-        
-        logger.info(f"Cleaned {entry_count} entries in history data")
-        
-        # Write to output file
-        with open(output_path, 'w') as f:
-            json.dump(history_data, f, indent=2)
-            logger.info(f"Successfully wrote cleaned history to {output_path}")
+            for element in state.get('interacted_element') or ():
+                if type(element) is dict and element:
+                    for key in COORDINATE_KEYS.intersection(element):
+                        element[key] = {}
+                    if debug:
+                        logger.debug("Cleaned coordinates in entry %s", entry_count)
+        
+        logger.info("Cleaned %s entries in history data", entry_count)
+        return history_data
+
+    @staticmethod
+    def serialize_cleaned_history(history_data: dict) -> bytes:
+        """
+        Serialize cleaned history data the way it is saved and sent to the code generator.
+        
+        Args:
+            history_data: Cleaned history JSON
             
-        return str(output_path) 
\ No newline at end of file
+        Returns:
+            bytes: Indented JSON
+        """
+        return orjson.dumps(history_data, option=orjson.OPT_INDENT_2)
+
+    @staticmethod
+    def write_cleaned_history(history_data: dict | bytes, output_path: str) -> str:
+        """
+        Write cleaned history data to disk.
+        
+        Args:
+            history_data: Cleaned history JSON, or its bytes from serialize_cleaned_history
+            output_path: Path for the output cleaned history file
+            
+        Returns:
+            str: Path to the cleaned history file
+        """
+        if not isinstance(history_data, bytes):
+            history_data = HistoryCleaner.serialize_cleaned_history(history_data)
+        Path(output_path).write_bytes(history_data)
+        logger.info("Successfully wrote cleaned history to %s", output_path)
+        return str(output_path)
@@ -1,15 +1,26 @@
 import logging
 import sys
 
-def setup_logger():
-    """Configure global logging settings"""
+def setup_logger(level: str = 'INFO'):
+    """
+    Configure global logging settings once per process; called by the application entry point
+    
+    Args:
+        level: Name of the root log level, e.g. the LOG_LEVEL setting; unknown names fall back to INFO
+    """
+    # Streamlit re-executes the app script on every rerun; only the first call configures the root logger
+    if logging.getLogger().handlers:
+        return
+    
+    # DEBUG output is very chatty and costly to format, so it is opt-in through LOG_LEVEL
+    level_name = (level or 'INFO').strip().upper()
+    known_level = isinstance(logging.getLevelName(level_name), int)
     logging.basicConfig(
-        level=logging.DEBUG,
+        level=level_name if known_level else logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.StreamHandler(sys.stdout)
         ]
     )
-
-# Call setup_logger when this module is imported
-setup_logger() 
\ No newline at end of file
+    if not known_level:
+        logging.getLogger(__name__).warning("Unknown log level %r, using INFO", level)
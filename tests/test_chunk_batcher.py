@@ -0,0 +1,28 @@
+from utils.chunk_batcher import ChunkBatcher
+
+
+def _batches(batcher, chunks):
+    batches = [batch for batch in map(batcher.feed, chunks) if batch is not None]
+    tail = batcher.flush()
+    return batches + ([tail] if tail is not None else [])
+
+
+def test_first_chunk_is_released_immediately_and_the_rest_in_batches():
+    batcher = ChunkBatcher(max_chars=4, max_seconds=60)
+
+    assert _batches(batcher, ["a", "bc", "de", "f", "g"]) == ["a", "bcde", "fg"]
+
+
+def test_batches_reassemble_the_full_response():
+    chunks = ["import", " {", " test", " }", " from", " '@playwright/test';\n"]
+    batcher = ChunkBatcher(max_chars=8, max_seconds=60)
+
+    assert "".join(_batches(batcher, chunks)) == "".join(chunks)
+    assert batcher.text == "".join(chunks)
+    assert batcher.chunks == chunks
+
+
+def test_batch_is_released_once_the_interval_passed():
+    batcher = ChunkBatcher(max_chars=1000, max_seconds=0)
+
+    assert _batches(batcher, ["a", "b", "c"]) == ["a", "b", "c"]
@@ -0,0 +1,44 @@
+from utils.code_fence_stripper import CodeFenceStripper
+
+
+def _strip(chunks):
+    stripper = CodeFenceStripper()
+    for chunk in chunks:
+        stripper.feed(chunk)
+    return stripper
+
+
+def test_opening_and_closing_fences_are_removed():
+    stripper = _strip(["```typescript\nimport { test } from '@playwright/test';\n", "test('x', async () => {});\n```\n"])
+
+    assert stripper.finish() == "import { test } from '@playwright/test';\ntest('x', async () => {});\n"
+
+
+def test_fences_split_across_chunks_are_removed():
+    stripper = _strip(["``", "`pyt", "hon\nprint(1)\n`", "``"])
+
+    assert stripper.finish() == "print(1)\n"
+
+
+def test_partial_line_starting_with_a_backtick_is_held_back():
+    stripper = _strip(["const a = 1;\n", "``"])
+
+    assert stripper.text == "const a = 1;\n"
+
+    stripper.feed("`\n")
+    assert stripper.text == "const a = 1;\n"
+
+
+def test_partial_line_is_shown_while_streaming():
+    stripper = _strip(["const a = 1;\nconst b"])
+
+    assert stripper.text == "const a = 1;\nconst b"
+    assert stripper.finish() == "const a = 1;\nconst b"
+
+
+def test_text_since_returns_the_text_after_an_offset():
+    stripper = _strip(["```java\nline one\nline two\n", "line three\nline fo"])
+    text = stripper.text
+
+    for offset in range(len(text) + 1):
+        assert stripper.text_since(offset) == text[offset:]
@@ -0,0 +1,85 @@
+import copy
+import json
+
+from utils.history_cleaner import HistoryCleaner
+
+COORDINATE_SET = {
+    "top_left": {"x": 10, "y": 20},
+    "top_right": {"x": 110, "y": 20},
+    "bottom_left": {"x": 10, "y": 60},
+    "bottom_right": {"x": 110, "y": 60},
+    "center": {"x": 60, "y": 40},
+    "width": 100,
+    "height": 40,
+}
+
+
+def _element(xpath, coordinates):
+    return {
+        "tag_name": "input",
+        "xpath": xpath,
+        "highlight_index": 3,
+        "entire_parent_branch_path": ["html", "body", "form", "input"],
+        "attributes": {"name": "q", "placeholder": "Search {\"quoted\"}"},
+        "shadow_root": False,
+        "css_selector": "form > input[name=\"q\"]",
+        "page_coordinates": coordinates,
+        "viewport_coordinates": coordinates,
+        "viewport_info": {"scroll_x": 0, "scroll_y": 0, "width": 1280, "height": 720} if coordinates else None,
+    }
+
+
+def _history():
+    """A history shaped like browser_use's AgentHistoryList.save_to_file output"""
+    steps = []
+    for step, screenshot in enumerate(("iVBORw0KGgo\\u002b/A==", None, "")):
+        steps.append({
+            "model_output": {
+                "current_state": {"evaluation_previous_goal": "Success", "memory": "\"screenshot\": \"x\"", "next_goal": "Type"},
+                "action": [{"input_text": {"index": 3, "text": "Password123"}}],
+            },
+            "result": [{"is_done": False, "extracted_content": "Typed \"Password123\""}],
+            "state": {
+                "tabs": [{"page_id": 0, "url": "https://example.com/{a}", "title": "Example [1]"}],
+                "screenshot": screenshot,
+                "interacted_element": [_element(f"/html/body/form/input[{step}]", COORDINATE_SET if step != 1 else None), None],
+                "url": "https://example.com/",
+                "title": "Example",
+            },
+        })
+    return {"history": steps}
+
+
+def test_fast_clean_matches_full_clean(tmp_path):
+    history = _history()
+    history_path = tmp_path / "history.json"
+    history_path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+
+    fast = HistoryCleaner._fast_clean(history_path.read_bytes())
+    full = HistoryCleaner.clean_history_data(copy.deepcopy(history))
+
+    assert fast is not None
+    assert fast == full
+
+
+def test_fast_clean_rejects_screenshot_outside_state(tmp_path):
+    history = _history()
+    history["history"][0]["model_output"]["action"].append({"screenshot": "abc", "interacted_element": []})
+
+    assert HistoryCleaner._fast_clean(json.dumps(history, indent=2).encode()) is None
+
+
+def test_fast_clean_rejects_deeper_coordinate_nesting():
+    history = _history()
+    history["history"][0]["state"]["interacted_element"][0]["viewport_info"] = {"scroll": {"x": {"value": 0}}}
+
+    assert HistoryCleaner._fast_clean(json.dumps(history, indent=2).encode()) is None
+
+
+def test_load_cleaned_history_falls_back_to_full_clean(tmp_path):
+    history = _history()
+    history["history"][0]["state"]["interacted_element"][0]["viewport_info"] = {"scroll": {"x": {"value": 0}}}
+    history_path = tmp_path / "history.json"
+    history_path.write_text(json.dumps(history, indent=2), encoding="utf-8")
+
+    assert HistoryCleaner.load_cleaned_history(history_path, fast=True) == HistoryCleaner.clean_history_data(copy.deepcopy(history))
@@ -0,0 +1,34 @@
+from services.task_cache import TaskCache
+
+
+def test_tasks_differing_only_in_case_get_different_keys(tmp_path):
+    cache = TaskCache(tmp_path / "task_cache.db")
+    assert cache.key("type Password123", "openai", "gpt-4o", False, "local", "", 20) != cache.key("type password123", "openai", "gpt-4o", False, "local", "", 20)
+
+
+def test_tasks_differing_only_in_whitespace_share_a_key(tmp_path):
+    cache = TaskCache(tmp_path / "task_cache.db")
+    assert cache.key("go to  google.com\n", "openai", "gpt-4o", False, "local", "", 20) == cache.key("go to google.com", "openai", "gpt-4o", False, "local", "", 20)
+
+
+def test_provider_and_model_are_case_insensitive(tmp_path):
+    cache = TaskCache(tmp_path / "task_cache.db")
+    assert cache.key("go to google.com", "OpenAI", "GPT-4o", False, "local", "", 20) == cache.key("go to google.com", "openai", "gpt-4o", False, "local", "", 20)
+
+
+def test_browser_and_step_settings_are_part_of_the_key(tmp_path):
+    cache = TaskCache(tmp_path / "task_cache.db")
+    key = cache.key("go to google.com", "openai", "gpt-4o", False, "local", "", 20)
+    assert key != cache.key("go to google.com", "openai", "gpt-4o", False, "remote", "browserbase", 20)
+    assert key != cache.key("go to google.com", "openai", "gpt-4o", False, "local", "", 30)
+    assert key == cache.key("go to google.com", "openai", "gpt-4o", False, "local", "browserbase", 20)
+
+
+def test_expired_entries_are_not_returned(tmp_path):
+    history_path = tmp_path / "history.json"
+    history_path.write_text("{}", encoding="utf-8")
+    key = TaskCache(tmp_path / "task_cache.db").key("go to google.com", "openai", "gpt-4o", False, "local", "", 20)
+
+    TaskCache(tmp_path / "task_cache.db").set(key, history_path)
+    assert TaskCache(tmp_path / "task_cache.db").get(key) == history_path
+    assert TaskCache(tmp_path / "task_cache.db", ttl_seconds=-1).get(key) is None